@@ -1,7 +1,7 @@
 # Import the required libraries
 import streamlit as st
 import pandas as pd
-from utils.io import load_data
+from utils.dataset import load_dataset
 import pathlib
 
 # Import the various pages
@@ -20,37 +20,11 @@ st.set_page_config(
     initial_sidebar_state="auto",
 )
 
-# Load data
-@st.cache_data
+# Load data (one read-only dataset shared by all sessions of this process)
+@st.cache_resource
 def get_data():
-    df = load_data()
-    return df
-df = load_data()
-
-# The right data types
-df["name"] = df["name"].astype("string")
-df["first_release_date"] = df["first_release_date"].astype("datetime64[ns]")
-df["cover"] = df["cover"].astype("string")
-df["total_rating"] = df["total_rating"].astype("float64")
-df["developer_company"] = df["developer_company"].astype("object")
-df["developer_country"] = df["developer_country"].astype("object")
-df["publisher_company"] = df["publisher_company"].astype("object")
-df["publisher_country"] = df["publisher_country"].astype("object")
-df["platforms"] = df["platforms"].astype("object")
-df["platform_family"] = df["platform_family"].astype("object")
-df["platform_type"] = df["platform_type"].astype("category")
-df["generation_platform"] = df["generation_platform"].astype("Int64")
-df["game_type"] = df["game_type"].astype("category")
-df["game_modes"] = df["game_modes"].astype("object")
-df["player_perspectives"] = df["player_perspectives"].astype("object")
-df["genres"] = df["genres"].astype("object")
-df["remake"] = df["remake"].astype("bool")
-df["remaster"] = df["remaster"].astype("bool")
-df["early_access"] = df["early_access"].astype("bool")
-df["dlcs"] = df["dlcs"].astype("int64")
-df["generation_platform"] = df["generation_platform"].astype("int64")
-df["age_rattings"] = df["age_rattings"].astype("category")
-df["has_reliable_votes"] = df["has_reliable_votes"].astype("bool")
+    return load_dataset()
+data = get_data()
 
 
 
@@ -148,14 +122,14 @@ st.sidebar.markdown(
 
 # Display page based on selection
 if st.session_state.page == "Home":
-    show_home(df,COLORS)
+    show_home(data,COLORS)
 elif st.session_state.page == "Metrics":
-    show_metrics_quality(df,COLORS)
+    show_metrics_quality(data,COLORS)
 elif st.session_state.page == "Ratings":
-    show_notes(df,COLORS) 
+    show_notes(data,COLORS) 
 elif st.session_state.page == "Quantity":
-    show_quantity(df,COLORS)
+    show_quantity(data,COLORS)
 elif st.session_state.page == "Map":
-    show_map(df,COLORS)
+    show_map(data,COLORS)
 elif st.session_state.page == "Conclusion":
-    show_conclusion(df,COLORS)
\ No newline at end of file
+    show_conclusion(data,COLORS)
\ No newline at end of file
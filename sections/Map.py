@@ -1,16 +1,25 @@
 # Import the required libraries
 import streamlit as st
-import pandas as pd
-import ast
-import pycountry
 
 # Import the various functions
 from utils.visualisation_map import map_general
 from utils.visualisation_map import map_general_year
 from utils.visualisation_map import camemberg
+from utils.query import Query
+from utils.grid import show_grid
+from utils.export import FORMATS
 
 
-def show_map(df,COLORS):
+# The animated map is built once per reliability and dataset version and shared
+# by all sessions (Streamlit only reads the figure to serialise it)
+@st.cache_resource(show_spinner=False)
+def year_map(_data, version, reliable_only, title):
+    df_map = _data.countries.slice(reliable_only=reliable_only, by_year=True)
+    return map_general_year(df_map, title)
+
+
+def show_map(data,COLORS):
+    df = data.view()
 
     st.title("The world of video games: Developer and Publisher")
 
@@ -31,78 +40,20 @@ def show_map(df,COLORS):
 
     map1, gen = st.columns([0.75, 0.25])
 
-    # explode list of country (developer and publisher)
-    def explode_country(df_proc, country, type, by_year=False):
-        df_proc[country] = df_proc[country].replace("Unknown", "[]")
-        df_proc[country] = df_proc[country].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else (x if isinstance(x, list) else []))
-
-        if by_year:
-            return df_proc.explode(country)[[country, "year"]].rename(columns={country: "country"}).assign(type=type)
-        else:
-            return df_proc.explode(country)[country].rename("country").to_frame().assign(type=type)
-
     with gen:
         no_reliable = st.checkbox("Disable reliable votes (Warning: by disabling this, many small indie companies haven't specified their country, which can skew the results)")
         by_year = st.checkbox("If you prefer to see the number of releases per year (by default, uncheck to show all releases from 2000 to 2025)")
-        df["first_release_date"] = pd.to_datetime(df["first_release_date"])
-        df["year"] = df["first_release_date"].dt.year
+        df = df.assign(year=data.features["year"])
 
     with map1:
-        def process_countries(df, no_reliable=False, by_year=False):
-            df_proc = df.copy()    
-
-            # reliable or not
-            if not no_reliable:
-                df_proc = df_proc[df_proc["has_reliable_votes"] == True]
-            
-            # by year or global
-            if by_year:
-                df_proc["first_release_date"] = pd.to_datetime(df_proc["first_release_date"], errors="coerce")
-                df_proc["year"] = df_proc["first_release_date"].dt.year
-            
-            df_devs = explode_country(df_proc, "developer_country", "developer", by_year)
-            df_pubs = explode_country(df_proc, "publisher_country", "publisher", by_year)
-
-            # iso code for the map
-            def get_iso_alpha(country_name):
-                try:
-                    return pycountry.countries.lookup(country_name).alpha_3
-                except:
-                    return None
-            
-            df_countries = pd.concat([df_devs, df_pubs], ignore_index=True)
-            df_countries["iso_alpha"] = df_countries["country"].apply(get_iso_alpha)
-            
-            # group of columns 
-            group = ["country", "iso_alpha", "type"]
-            if by_year:
-                group.append("year")
-            
-            df_countries = df_countries.groupby(group).size().reset_index(name="count")
-            
-            # We need total sum of developer + publisher
-            pivot_index = ["country", "iso_alpha"]
-            if by_year:
-                pivot_index.append("year")
-            
-            df_countries_map = df_countries.pivot_table(index=pivot_index,columns="type",values="count",fill_value=0).reset_index()
-            df_countries_map["total"] = df_countries_map["developer"] + df_countries_map["publisher"]
-            
-            # Sort year 
-            if by_year:
-                df_countries_map = df_countries_map.sort_values("year").reset_index(drop=True)
-            
-            return df_countries_map
-
         if by_year:
-            df_map = process_countries(df, no_reliable, True)
             if no_reliable:
                 title = "Distribution of developer / publisher by country and year (with rating, reliable or not)"
             else:
                 title = "Distribution of developer / publisher by country and year (only reliable votes)"
-            fig = map_general_year(df_map, title)
+            fig = year_map(data, data.version, not no_reliable, title)
         else:
-            df_map = process_countries(df, no_reliable, False)
+            df_map = data.countries.slice(reliable_only=not no_reliable, by_year=False)
             if no_reliable:
                 title = "Distribution of developer / publisher by country (with rating, reliable or not)"
             else:
@@ -193,23 +144,13 @@ def show_map(df,COLORS):
         # Choice: developers
         developer_all = st.checkbox("All developers", value=True)
         developer = st.text_input("Find a developer:", disabled=developer_all)
-        if developer.strip():
-            results_df_dev = explode_country(df, "developer_company", "developer")
-            stock_dev = results_df_dev[results_df_dev["country"].str.contains(developer, case=False, na=False)]
-            results_dev = stock_dev["country"].unique().tolist()
-        else:
-            results_dev = []
+        results_dev = data.search("developer_company").search(developer)
         selected_game_dev = st.selectbox("Select a developer:", results_dev, disabled=developer_all or not developer.strip())
 
         # Choice: publishers
         publisher_all = st.checkbox("All publishers", value=True)
         publisher = st.text_input("Find a publisher:", disabled=publisher_all)
-        if publisher.strip():
-            results_df_pub = explode_country(df, "publisher_company", "publisher")
-            stock_pub = results_df_pub[results_df_pub["country"].str.contains(publisher, case=False, na=False)]
-            results_pub = stock_pub["country"].unique().tolist()
-        else:
-            results_pub = []
+        results_pub = data.search("publisher_company").search(publisher)
         selected_game_pub = st.selectbox("Select a publisher:", results_pub, disabled=publisher_all or not publisher.strip())
 
         # Choice: platform family (the 3 big)
@@ -222,9 +163,6 @@ def show_map(df,COLORS):
         pc = st.checkbox("PC releases?", disabled=not is_exclu)
 
         # Choice: precise platform
-        df["platform_family"] = df["platform_family"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else (x if isinstance(x, list) else []))
-        df["platforms"] = df["platforms"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else (x if isinstance(x, list) else []))
-        df_filtered = df[df["platform_family"].apply(lambda lst: set(lst) == {selected_platform_fam})]
         excluded_platforms = {
             "Windows Phone", "Legacy Mobile Device", "Web browser", "BlackBerry OS",
             "WonderSwan Color", "Neo Geo Pocket Color", "MSX", "Gizmondo", "Digiblast",
@@ -232,75 +170,43 @@ def show_map(df,COLORS):
             "SteamVR", "Gear VR", "Meta Quest 3", "Oculus Go", "Windows Mixed Reality",
             "Oculus VR", "Daydream", "Meta Quest 2", "Oculus Rift"
         }
-        all_platforms = set(p for sublist in df_filtered["platforms"] for p in sublist if p not in excluded_platforms)
+        all_platforms = data.platforms.platforms(selected_platform_fam, exclude=excluded_platforms)
         
         is_platform = st.checkbox("All platform of this family?", disabled=platform_fam_all, value=True)
         selected_platform = st.selectbox("Select a platform:", all_platforms, disabled=is_platform)
         full_exclu = st.checkbox("Cross-generation?", disabled=is_platform)
+        if full_exclu and not is_platform:
+            other_generations = data.platforms.other_generations(selected_platform, exclude=excluded_platforms)
+            if other_generations:
+                st.caption(f"Includes its games also released on {', '.join(other_generations)}")
 
     with col1:
-        df_final = df.copy()  
-
-        # df with reliable
-        if(reliable_only):
-            df_final = df_final[df_final["has_reliable_votes"] == True]
-        
-        # df with developers
-        if(not developer_all):
-            df_final = df_final[df_final["developer_company"].apply(lambda lst: selected_game_dev in (lst if isinstance(lst, list) else []))]
-        
-        # df with publishers
-        if(not publisher_all):
-            df_final = df_final[df_final["publisher_company"].apply(lambda lst: selected_game_pub in (lst if isinstance(lst, list) else []))]
-        
-        if df_final.empty:
-            df_final = pd.DataFrame(columns=df.columns)
-
-        # df with platform family
-        if not platform_fam_all:
-            df_final["platform_family"] = df_final["platform_family"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else (x if isinstance(x, list) else []))
-
-            if is_exclu:
-                if not pc:
-                    df_final = df_final[df_final["platform_family"].apply(lambda lst: set(lst) == {selected_platform_fam})]
-                else:
-                    df_final = df_final[df_final["platform_family"].apply(lambda lst: set(lst) == {selected_platform_fam} or set(lst) == {selected_platform_fam, "Windows"})]
-            else:
-                df_final = df_final[df_final["platform_family"].apply(lambda lst: selected_platform_fam in lst)]
-        
-        if df_final.empty:
-            df_final = pd.DataFrame(columns=df.columns)
-        
-        # df with platform
-        if not is_platform:
-            df_final["platforms"] = df_final["platforms"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else (x if isinstance(x, list) else []))
-            
-            if not full_exclu:
-                if not pc:
-                    df_final = df_final[df_final["platforms"].apply(lambda lst: set(lst) == {selected_platform})]
-                else:
-                    df_final = df_final[df_final["platforms"].apply(lambda lst: set(lst) == {selected_platform} or set(lst) == {selected_platform, "PC"})]
-            else:
-                if not pc:
-                    df_final = df_final[df_final["platforms"].apply(lambda lst: selected_platform in lst)]
-                else:
-                    df_final = df_final[df_final["platforms"].apply(lambda lst: selected_platform in lst or "PC" in lst)]
-        
-        if df_final.empty:
-            df_final = pd.DataFrame(columns=df.columns)
+        query = Query(
+            reliable_only=reliable_only,
+            developer=None if developer_all else selected_game_dev or "",
+            publisher=None if publisher_all else selected_game_pub or "",
+            family=None if platform_fam_all else selected_platform_fam,
+            exclusive=is_exclu,
+            pc=pc,
+            platform=None if is_platform else selected_platform or "",
+            cross_generation=full_exclu,
+        )
+        result = data.query(query)
 
         # pie 
-        df_final["genres"] = df_final["genres"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-
-        if categories == "genres":
-            df_genres = df_final.explode("genres")
-            df_pie = df_genres.groupby("genres").size().reset_index(name="count")
-        else:
-            df_pie = df_final.groupby(categories).size().reset_index(name="count")
+        df_pie = result.counts(categories)
 
         fig = camemberg(df_pie, categories)
         st.plotly_chart(fig)
     
-        df_final = df_final.sort_values("first_release_date")
-        st.write(f"Number of filtered games: {len(df_final)}")
-        st.dataframe(df_final)
+        st.write(f"Number of filtered games: {len(result)}")
+        show_grid(df, "map_grid", rows=result.rows)
+
+        # Only the filtered games, written when a button is clicked
+        csv_col, parquet_col = st.columns(2)
+        with csv_col:
+            st.download_button("Download filtered games (CSV)", data=data.exports.on_click("csv.gz", result.rows),
+                               file_name="filtered_games.csv.gz", mime=FORMATS["csv.gz"], on_click="ignore")
+        with parquet_col:
+            st.download_button("Download filtered games (Parquet)", data=data.exports.on_click("parquet", result.rows),
+                               file_name="filtered_games.parquet", mime=FORMATS["parquet"], on_click="ignore")
@@ -1,6 +1,6 @@
 import streamlit as st
 
-def show_conclusion(df,COLORS):
+def show_conclusion(data,COLORS):
     with st.container(key="intro"):
         st.title("Conclusion and Future Perspectives")
         st.subheader("Reflecting on the Evolution of Video Games")
@@ -1,8 +1,24 @@
 # Import the required libraries
 import streamlit as st
-import ast
 
-def show_home(df,COLORS):
+# Import the various functions
+from utils.grid import show_grid
+from utils.covers import CoverCache, DEFAULT_COVER, cover_url
+from utils.export import FORMATS
+
+# Random games drawn in advance, whose covers are downloaded before they are shown
+RANDOM_AHEAD = 3
+
+
+# One cover cache per process, shared by the sessions
+@st.cache_resource
+def get_covers():
+    return CoverCache()
+
+
+def show_home(data,COLORS):
+    df = data.view()
+    covers = get_covers()
     
     # Introduction
     with st.container(key="intro"):
@@ -28,17 +44,6 @@ def show_home(df,COLORS):
             unsafe_allow_html=True
         )
 
-        def safe_eval(val):
-            if isinstance(val, str):
-                try:
-                    return ast.literal_eval(val)
-                except Exception:
-                    return []  
-            elif isinstance(val, list):
-                return val
-            else:
-                return []  
-
     with st.container(key="zone-jeu"):
         # the search bar
         col1, col2 = st.columns([0.8, 0.2])  
@@ -47,11 +52,15 @@ def show_home(df,COLORS):
             game_name = st.text_input("Find a game:", key="search")
         
         if st.button("Explore random game", key="random"):
-            game_name = df.sample(n=1)["name"].iloc[0]
+            upcoming = st.session_state.setdefault("random_games", [])
+            upcoming.extend(df["id"].sample(n=RANDOM_AHEAD + 1 - len(upcoming)).tolist())
+            game_name = data.game(upcoming.pop(0))["name"]
+            covers.prefetch(data.game(game_id)["cover"] for game_id in upcoming)
 
         with col2:
             if game_name:
-                results = df[df['name'].str.contains(game_name, case=False)]
+                # Best matches first, typos tolerated (at most 50)
+                results = df.iloc[data.titles.search(game_name)]
                 if results.empty:
                     st.markdown(
                         f'<div class="no-results" style="color:{COLORS["negative"]};">No games</div>',
@@ -66,9 +75,14 @@ def show_home(df,COLORS):
     # If the game is found
     if game_name and not results.empty:
         with st.container(key="game"):
-            selected_game = st.selectbox("Select a game:", results["name"])
+            # Games sharing a title (remakes, remasters...) are told apart by year and type
+            labels = {}
+            duplicated = results["name"].duplicated(keep=False)
+            for game_id, name, date, game_type, twin in zip(results["id"], results["name"], results["first_release_date"], results["game_type"], duplicated):
+                labels[game_id] = f"{name} ({date.year}, {game_type})" if twin else name
+            selected_game = st.selectbox("Select a game:", list(labels), format_func=labels.get)
             # Get data for the selected game
-            game_data = results[results["name"] == selected_game].iloc[0]
+            game_data = data.game(selected_game)
 
             # Display game name
             if(game_data["early_access"]):
@@ -78,13 +92,13 @@ def show_home(df,COLORS):
 
             image_width = 250
             
-            # Display cover image
-            cover_url = game_data.get("cover")
-            cover_url = "https:" + cover_url # Because it's start with //
-            if cover_url != "https:https://i.imgur.com/VsWBrKg.jpeg":
-                st.image(cover_url, caption="Official cover", width=image_width)
+            # Display cover image (local thumbnail, or the remote image when it cannot be downloaded)
+            cover = game_data.get("cover")
+            image = covers.get(cover) or cover_url(cover)
+            if cover != DEFAULT_COVER:
+                st.image(image, caption="Official cover", width=image_width)
             else:
-                st.image("https://i.imgur.com/VsWBrKg.jpeg", caption="No official cover", width=image_width)
+                st.image(image, caption="No official cover", width=image_width)
 
             # Display game type 
             game_type = game_data.get("game_type")
@@ -150,8 +164,8 @@ def show_home(df,COLORS):
                 st.markdown(badges_html, unsafe_allow_html=True)
 
                 # Display developers
-                developers = safe_eval(game_data.get("developer_company"))
-                developers_country = safe_eval(game_data.get("developer_country"))
+                developers = game_data.get("developer_company")
+                developers_country = game_data.get("developer_country")
                 html_developers = f'<div style="margin-top: 15px; color:{COLORS["text"]};"><strong>Developers:</strong><br>'
                 for i, dev in enumerate(developers):
                     country = developers_country[i] if i < len(developers_country) else "N/A"
@@ -160,8 +174,8 @@ def show_home(df,COLORS):
                 st.markdown(html_developers, unsafe_allow_html=True)
 
                 # Display publishers
-                publishers = safe_eval(game_data.get("publisher_company"))
-                publishers_country = safe_eval(game_data.get("publisher_country"))
+                publishers = game_data.get("publisher_company")
+                publishers_country = game_data.get("publisher_country")
                 html_publishers = f'<div style="margin-top: 5px; color:{COLORS["text"]};"><strong>Publishers:</strong><br>'
                 for i, pub in enumerate(publishers):
                     country = publishers_country[i] if i < len(publishers_country) else "N/A"
@@ -170,7 +184,7 @@ def show_home(df,COLORS):
                 st.markdown(html_publishers, unsafe_allow_html=True)
 
                 # Display game mod
-                game_mod = safe_eval(game_data.get("game_modes"))
+                game_mod = game_data.get("game_modes")
                 html_game_mod = f'<div style="margin-top: 15px; color:{COLORS["text"]};"><strong>Game mod:</strong><br>'
                 for i in game_mod:
                     html_game_mod += f"- {i}<br>"
@@ -178,7 +192,7 @@ def show_home(df,COLORS):
                 st.markdown(html_game_mod, unsafe_allow_html=True)
 
                 # Display perspectives
-                player_perspectives = safe_eval(game_data.get("player_perspectives"))
+                player_perspectives = game_data.get("player_perspectives")
                 html_player_perspectives = f'<div style="margin-top: 5px; color:{COLORS["text"]};"><strong>Player perspectives:</strong><br>'
                 for i in player_perspectives:
                     html_player_perspectives += f"- {i}<br>"
@@ -251,8 +265,8 @@ def show_home(df,COLORS):
                 )
 
                 # Display platform 
-                platforms = safe_eval(game_data.get("platforms"))
-                platform_family = safe_eval(game_data.get("platform_family"))
+                platforms = game_data.get("platforms")
+                platform_family = game_data.get("platform_family")
                 html_platforms = f'<div style="margin-top: 15px; color:{COLORS["text"]};"><strong>Platforms:</strong><br>'
                 for i, plat in enumerate(platforms):
                     family = platform_family[i] if i < len(platform_family) else "N/A"
@@ -261,7 +275,7 @@ def show_home(df,COLORS):
                 st.markdown(html_platforms, unsafe_allow_html=True)
 
                 # Display type platform
-                platform_type = safe_eval(game_data.get("platform_type"))
+                platform_type = game_data.get("platform_type")
                 html_platforms_type = f'<div style="margin-top: 5px; margin-bottom: 5px; color:{COLORS["text"]};"><strong>Platform type:</strong><br>'
                 for i in platform_type:
                     html_platforms_type += f"- {i}<br>"
@@ -274,7 +288,7 @@ def show_home(df,COLORS):
                     st.write(f"Generation: {generation}")
 
                 # Display type genre
-                genre = safe_eval(game_data.get("genres"))
+                genre = game_data.get("genres")
                 html_genre = f'<div style="margin-bottom: 15px; color:{COLORS["text"]};"><strong>Genres:</strong><br>'
                 for i in genre:
                     html_genre += f"- {i}<br>"
@@ -284,6 +298,15 @@ def show_home(df,COLORS):
                 # Display dlcs
                 st.write(f"Number dlcs: {game_data.get('dlcs')}")
 
+            # Display similar games (same genres, perspectives, modes, platforms and developers)
+            similar = data.similar(selected_game)
+            if not similar.empty:
+                html_similar = f'<div style="margin-top: 15px; color:{COLORS["text"]};"><strong>Similar games:</strong><br>'
+                for name, date, similarity in zip(similar["name"], similar["first_release_date"], similar["similarity"]):
+                    html_similar += f"- {name} ({date.year}) - {similarity:.0%} similar<br>"
+                html_similar += "</div>"
+                st.markdown(html_similar, unsafe_allow_html=True)
+
     st.markdown("---")
 
     st.markdown(
@@ -304,16 +327,24 @@ def show_home(df,COLORS):
         if st.button("Explore all dataset", key="explore_btn"):
             st.session_state.show_df = True
 
-        # Download button (toujours visible)
-        csv = df.to_csv(index=False).encode('utf-8')
+        # Download buttons (toujours visibles), the files are only built on click
+        st.download_button(
+            label="Download dataset (CSV)",
+            data=data.exports.on_click("csv.gz"),
+            file_name="games.csv.gz",
+            mime=FORMATS["csv.gz"],
+            key="download_btn",
+            on_click="ignore"
+        )
         st.download_button(
-            label="Download dataset",
-            data=csv,
-            file_name="games.csv",
-            mime='text/csv',
-            key="download_btn"
+            label="Download dataset (Parquet)",
+            data=data.exports.on_click("parquet"),
+            file_name="games.parquet",
+            mime=FORMATS["parquet"],
+            key="download_parquet_btn",
+            on_click="ignore"
         )
 
     # Display dataset if flag is True
     if st.session_state.show_df:
-        st.dataframe(df)
+        show_grid(df, "home_grid")
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
+from utils.io import LIST_COLUMNS
 
-def show_metrics_quality(df,COLORS):
+def show_metrics_quality(data,COLORS):
+    df = data.view()
     
     st.title("Dataset Overview & Metrics")
 
@@ -22,8 +24,8 @@ def show_metrics_quality(df,COLORS):
     total_reliable = df['has_reliable_votes'].sum()
     average_rating = round(df['total_rating'].mean(), 2)
     average_rating_reliable = round(df[df['has_reliable_votes']]['total_rating'].mean(), 2)
-    first_year = df['first_release_date'].dt.year.min()
-    last_year = df['first_release_date'].dt.year.max()
+    first_year = data.features['year'].min()
+    last_year = data.features['year'].max()
 
     # Display KPIs in columns
     col1, col2, col3 = st.columns(3)
@@ -49,8 +51,9 @@ def show_metrics_quality(df,COLORS):
     st.markdown(f"<h5 style='color:{COLORS['highlight']}'>Missing Values by column</h5>", unsafe_allow_html=True)
     st.dataframe(missing_df, use_container_width=True)
 
-    # Duplicates
-    st.markdown(f"<span style='color:{COLORS['subtext']}'>Number of duplicate rows: {df.duplicated().sum()}</span>", unsafe_allow_html=True)
+    # Duplicates (lists are not hashable, so they are compared as tuples; ids are always unique)
+    df_hashable = df.drop(columns="id").assign(**{col: df[col].map(tuple) for col in LIST_COLUMNS if col in df.columns})
+    st.markdown(f"<span style='color:{COLORS['subtext']}'>Number of duplicate rows: {df_hashable.duplicated().sum()}</span>", unsafe_allow_html=True)
 
     # Validation checks
     st.markdown("<h3 style='color:{}'>Validation Checks</h3>".format(COLORS['highlight']), unsafe_allow_html=True)
@@ -79,6 +82,7 @@ def show_metrics_quality(df,COLORS):
         f"""
         <div style="color:{COLORS['text']}">
         
+        - **id** - Identifier of the game (IGDB id)  
         - **name** - Name of the game  
         - **first_release_date** - Date when the game was first released  
         - **cover** - Cover image of the game  
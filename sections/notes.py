@@ -1,6 +1,5 @@
 # Import the required libraries
 import streamlit as st
-import ast
 
 # Import the various functions
 from utils.visualisation_quality import plot_average_rating
@@ -9,8 +8,33 @@ from utils.visualisation_quality import plot_average_rating_genre
 from utils.visualisation_quality import plot_average_rating_companies_exclu
 from utils.visualisation_quality import plot_top10
 from utils.visualisation_quality import camembert_grouped
+from utils.features import AGE_COLUMNS
+from utils.figures import FigureCache
 
-def show_notes(df,COLORS):
+
+# One figure cache per process, shared by the sessions
+@st.cache_resource
+def get_figures():
+    return FigureCache()
+
+
+def top_rated(games):
+    """
+    Games of a Top 15, best rating first (name, rounded rating, reliability).
+    """
+    games = games[["name", "total_rating", "has_reliable_votes"]]
+    games["total_rating"] = games["total_rating"].round(2)
+    return games.sort_values(by="total_rating", ascending=False)
+
+
+def show_notes(data,COLORS):
+    df = data.view()
+    features = data.features
+    figures = get_figures()
+
+    def show_figure(chart, plot, rows, *args):
+        # Drawn on the first view only (rows is only called then), then read back from the cache
+        st.image(figures.render(chart, plot, rows, *args, version=data.version), width="stretch")
 
     # Title and introduction 
     st.title("Distribution of Ratings")
@@ -50,11 +74,12 @@ def show_notes(df,COLORS):
         unsafe_allow_html=True
     )
 
-    # We calculate the average and store it
-    df_rating = df[["first_release_date", "total_rating", "has_reliable_votes"]]
-    df_rating["first_release_date"] = df["first_release_date"].dt.year
-    mean_by_year = df_rating.groupby(["first_release_date","has_reliable_votes"])["total_rating"].mean().reset_index()
-    mean_by_year.columns = ["year", "has_reliable_votes", "average_rating"]
+    # We read the averages from the pre-aggregated cube
+    cube = data.cube
+    def mean_by_year():
+        rows = cube.slice()[["year", "has_reliable_votes", "mean"]]
+        rows.columns = ["year", "has_reliable_votes", "average_rating"]
+        return rows
 
     # Analyse 
     st.markdown(
@@ -71,10 +96,9 @@ def show_notes(df,COLORS):
     )
 
     # Display : Average Game Rating by Release Year
-    fig = plot_average_rating(mean_by_year, only_reliable)
     scol1, col2, col3 = st.columns([1,3,1])
     with col2:
-        st.pyplot(fig)
+        show_figure("average_rating", plot_average_rating, mean_by_year, only_reliable)
 
     st.markdown("---")
 
@@ -82,22 +106,21 @@ def show_notes(df,COLORS):
 
     with col_left_collect:
         # We calculate the average and store it (with collections)
-        df_rating_collect = df[["first_release_date", "total_rating", "has_reliable_votes", "has_collections"]]
-        df_rating_collect["first_release_date"] = df["first_release_date"].dt.year
-        mean_by_year_collect = df_rating_collect.groupby(["first_release_date","has_reliable_votes", "has_collections"])["total_rating"].mean().reset_index()
-        mean_by_year_collect.columns = ["year", "has_reliable_votes", "has_collections","average_rating"]
+        def mean_by_year_collect():
+            rows = cube.slice("has_collections")[["year", "has_reliable_votes", "has_collections", "mean"]]
+            rows.columns = ["year", "has_reliable_votes", "has_collections","average_rating"]
+            return rows
 
         # Display : Average Game Rating by Release Year (by Collection)
-        fig = plot_average_rating_collection(mean_by_year_collect, only_reliable)
-        st.pyplot(fig)
+        show_figure("average_rating_collection", plot_average_rating_collection, mean_by_year_collect, only_reliable)
 
     with col_right_collect:
         # Create a summary table of counts
         if(only_reliable):
-            filtered_df_collections = df_rating_collect[df_rating_collect["has_reliable_votes"] == True]
-            collection_count = (filtered_df_collections.groupby(["first_release_date", "has_collections"]).size().reset_index(name="count").pivot(index="first_release_date", columns="has_collections", values="count").astype(int).rename(columns={True: "Collections", False: "Non-Collections"}))
+            count_collect = cube.slice("has_collections", reliable=True, rollup=True)
         else:
-            collection_count = (df_rating_collect.groupby(["first_release_date", "has_collections"]).size().reset_index(name="count").pivot(index="first_release_date", columns="has_collections", values="count").astype(int).rename(columns={True: "Collections", False: "Non-Collections"}))
+            count_collect = cube.slice("has_collections", rollup=True)
+        collection_count = (count_collect.pivot(index="year", columns="has_collections", values="count").rename_axis("first_release_date").astype(int).rename(columns={True: "Collections", False: "Non-Collections"}))
         st.markdown(f"### <span style='color:{COLORS['text']}'>Number of Games per Year (Collections)</span>", unsafe_allow_html=True)
         st.dataframe(collection_count, use_container_width=True)
 
@@ -140,24 +163,21 @@ def show_notes(df,COLORS):
 
     with col_left_genre:
         # We calculate the average and store it (with indie)
-        df_rating_genres = df[["first_release_date", "total_rating", "has_reliable_votes", "genres", "name"]]
-        df_rating_genres["first_release_date"] = df["first_release_date"].dt.year
-        df_rating_genres["genres"] = df_rating_genres["genres"].apply(lambda x: ast.literal_eval(x))
-        df_rating_genres["is_indie"] = df_rating_genres["genres"].apply(lambda x: "Indie" in x if isinstance(x, list) else False)
-        mean_by_year_indie = (df_rating_genres.groupby(["first_release_date", "has_reliable_votes", "is_indie"])["total_rating"].mean().reset_index())
-        mean_by_year_indie.columns = ["year", "has_reliable_votes", "is_indie","average_rating"]
+        def mean_by_year_indie():
+            rows = cube.slice("is_indie")[["year", "has_reliable_votes", "is_indie", "mean"]]
+            rows.columns = ["year", "has_reliable_votes", "is_indie","average_rating"]
+            return rows
 
         # Display : Average Game Rating by Release Year (by indie)
-        fig = plot_average_rating_genre(mean_by_year_indie, only_reliable)
-        st.pyplot(fig)
+        show_figure("average_rating_indie", plot_average_rating_genre, mean_by_year_indie, only_reliable)
 
     with col_right_genre:
         # Create a summary table of counts
         if(only_reliable):
-            filtered_df_genres = df_rating_genres[df_rating_genres["has_reliable_votes"] == True]
-            indie_counts = (filtered_df_genres.groupby(["first_release_date", "is_indie"]).size().reset_index(name="count").pivot(index="first_release_date", columns="is_indie", values="count").fillna(0).astype(int).rename(columns={True: "Indie", False: "Non-Indie"}))
+            count_indie = cube.slice("is_indie", reliable=True, rollup=True)
         else:
-            indie_counts = (df_rating_genres.groupby(["first_release_date", "is_indie"]).size().reset_index(name="count").pivot(index="first_release_date", columns="is_indie", values="count").astype(int).rename(columns={True: "Indie", False: "Non-Indie"}))
+            count_indie = cube.slice("is_indie", rollup=True)
+        indie_counts = (count_indie.pivot(index="year", columns="is_indie", values="count").rename_axis("first_release_date").fillna(0).astype(int).rename(columns={True: "Indie", False: "Non-Indie"}))
         st.markdown(f"### <span style='color:{COLORS['text']}'>Number of Games per Year (Indie)</span>", unsafe_allow_html=True)
         st.dataframe(indie_counts, use_container_width=True) 
 
@@ -208,7 +228,7 @@ def show_notes(df,COLORS):
     col_left_platforms, col_right_platforms = st.columns([3,1])
 
     with col_right_platforms:
-        names_list = {name for sublist in df["platform_family"].apply(ast.literal_eval) for name in sublist}
+        names_list = data.platforms.families
         name = st.selectbox(
             "Choose a platform",
             options=names_list,
@@ -218,18 +238,14 @@ def show_notes(df,COLORS):
 
     with col_left_platforms:
         # We calculate the average and store it (with platforms)
-        df_rating_platforms = df[["first_release_date", "total_rating", "has_reliable_votes", "platform_family"]]
-        df_rating_platforms["first_release_date"] = df["first_release_date"].dt.year
-        df_rating_platforms["platform_family"] = df_rating_platforms["platform_family"].apply(lambda x: ast.literal_eval(x))
-        df_rating_platforms["platform_family"] = df_rating_platforms["platform_family"].apply(lambda x: list(set(x)))
-        df_rating_platforms = df_rating_platforms[df_rating_platforms["platform_family"].apply(lambda x: name in x)]
-        df_rating_platforms["is_exclu"] = df_rating_platforms["platform_family"].apply(lambda x: True if x == [name] else False)
-        mean_by_year_platforms = (df_rating_platforms.groupby(["first_release_date", "has_reliable_votes", "is_exclu"])["total_rating"].mean().reset_index())
-        mean_by_year_platforms.columns = ["year", "has_reliable_votes", "is_exclu", "average_rating"]
-        
+        def mean_by_year_platforms():
+            rows = cube.slice("platform_family", "is_exclu")
+            rows = rows[rows["platform_family"] == name][["year", "has_reliable_votes", "is_exclu", "mean"]]
+            rows.columns = ["year", "has_reliable_votes", "is_exclu", "average_rating"]
+            return rows
+
         # Display : Average Game Rating by Release Year (by name and exclu)
-        fig = plot_average_rating_companies_exclu(mean_by_year_platforms, name, only_reliable)
-        st.pyplot(fig)
+        show_figure("average_rating_exclusives", plot_average_rating_companies_exclu, mean_by_year_platforms, name, only_reliable)
 
     st.markdown(
         f"""
@@ -324,19 +340,8 @@ def show_notes(df,COLORS):
         }
 
     with colpie:
-        df_pie = df[["total_rating","has_collections","has_reliable_votes"]].copy()
-
-        df_stock = df["game_modes"].apply(lambda x: ast.literal_eval(x))
-        df_pie["has_single_player"] = df_stock.apply(lambda modes: len(modes) == 1 and modes[0] == "Single player")
-        df_pie["has_multi"] = df_stock.apply(lambda modes: len(modes) == 1 and modes[0] in ["Multiplayer", "Co-operative"])
-        df_pie["has_both"] = df_stock.apply(lambda modes: len(modes) >= 2 and any(m in ["Single player", "Multiplayer", "Co-operative"] for m in modes))
-        df_pie["has_other"] = df_stock.apply(lambda modes: not (len(modes) == 1 and modes[0] == "Single player") and not (len(modes) == 1 and modes[0] in ["Multiplayer", "Co-operative"]) and not (len(modes) >= 2 and any(m in ["Single Ppayer", "Multiplayer", "Co-operative"] for m in modes)))
-
-        df_pie["age_everyone"] = df["age_rattings"] == "Everyone"
-        df_pie["age_child"] = df["age_rattings"] == "Child"
-        df_pie["age_teen"] = df["age_rattings"] == "Teen"
-        df_pie["age_young"] = df["age_rattings"] == "Young"
-        df_pie["age_18plus"] = df["age_rattings"] == "18+"
+        # Mode and age flags come from the feature table
+        df_pie = data.view(["total_rating","has_collections","has_reliable_votes","has_single_player","has_multi","has_both","has_other",*AGE_COLUMNS])
 
         df_pie = df_pie.sort_values(by="total_rating", ascending=False)
 
@@ -374,42 +379,17 @@ def show_notes(df,COLORS):
     col_top1, col_top2 = st.columns([1,1])
     
     with col_top1:
-        top10_collect = df[df["has_collections"] == True][["name","total_rating", "has_reliable_votes"]].copy()
-        top10_collect["total_rating"] = top10_collect["total_rating"].round(2)
-        top10_collect = top10_collect.sort_values(by="total_rating", ascending=False)
-
         # Display : Top 10 (collection)
-        fig = plot_top10(top10_collect, "flare", only_reliable)
-        st.pyplot(fig)
+        show_figure("top_collections", plot_top10, lambda: top_rated(df[df["has_collections"] == True]), "flare", only_reliable)
     
     with col_top2:
-        top10_no_collect = df[df["has_collections"] == False][["name","total_rating", "has_reliable_votes"]].copy()
-        top10_no_collect["total_rating"] = top10_no_collect["total_rating"].round(2)
-        top10_no_collect = top10_no_collect.sort_values(by="total_rating", ascending=False)
-
         # Display : Top 10 (no collection)
-        fig = plot_top10(top10_no_collect, "crest", only_reliable)
-        st.pyplot(fig)
+        show_figure("top_no_collections", plot_top10, lambda: top_rated(df[df["has_collections"] == False]), "crest", only_reliable)
 
     col_top3, col_top4 = st.columns([1, 1])
 
     with col_top3:
-        top10_indie = df_rating_genres[df_rating_genres["is_indie"] == True][["name", "total_rating", "has_reliable_votes"]].copy()
-        top10_indie["total_rating"] = top10_indie["total_rating"].round(2)
-        top10_indie = top10_indie.sort_values(by="total_rating", ascending=False)
-
-        fig = plot_top10(top10_indie, "magma", only_reliable)
-        st.pyplot(fig)
+        show_figure("top_indie", plot_top10, lambda: top_rated(df[features["is_indie"]]), "magma", only_reliable)
 
     with col_top4:
-        df_rating_platforms_exclu = df[["name", "first_release_date", "total_rating", "has_reliable_votes", "platform_family"]].copy()
-        df_rating_platforms_exclu["first_release_date"] = df_rating_platforms_exclu["first_release_date"].dt.year
-        df_rating_platforms_exclu["platform_family"] = df_rating_platforms_exclu["platform_family"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        df_rating_platforms_exclu["platform_family"] = df_rating_platforms_exclu["platform_family"].apply(lambda x: list(set(x)) if isinstance(x, list) else [])
-        df_rating_platforms_exclu["is_exclu"] = df_rating_platforms_exclu["platform_family"].apply(lambda x: len(x) == 1)
-        df_rating_platforms_exclu["total_rating"] = df_rating_platforms_exclu["total_rating"].round(2)
-        top10_exclu = df_rating_platforms_exclu[df_rating_platforms_exclu["is_exclu"] == True][["name", "total_rating", "has_reliable_votes"]].copy()
-        top10_exclu = top10_exclu.sort_values(by="total_rating", ascending=False)
-
-        fig = plot_top10(top10_exclu, palette="viridis", excluded_categories=only_reliable)
-        st.pyplot(fig)
\ No newline at end of file
+        show_figure("top_exclusives", plot_top10, lambda: top_rated(df[features["is_exclu"] == True]), "viridis", only_reliable)
\ No newline at end of file
@@ -1,8 +1,6 @@
 # Import the required libraries
 import streamlit as st
 import pandas as pd
-import numpy as np
-import ast
 
 # Import the various functions
 from utils.visualisation_quantity import plot_general
@@ -11,7 +9,7 @@ from utils.visualisation_quantity import camemberg_genres
 from utils.visualisation_quantity import parallele_comp
 
 
-def show_quantity(df,COLORS):
+def show_quantity(data,COLORS):
     
     # Title and introduction 
     st.title("Number of Release")
@@ -58,10 +56,11 @@ def show_quantity(df,COLORS):
         unsafe_allow_html=True
     )
 
-    df["first_release_date"] = df["first_release_date"].dt.year
+    # Counts per year are read from the pre-aggregated cube
+    cube = data.cube
+    columns = {"year": "first_release_date", "count": "number_of_games"}
 
-    df_general = df.groupby(["first_release_date", "has_reliable_votes"]).size().reset_index(name="number_of_games")
-    df_general = df_general[df_general["has_reliable_votes"] == True]
+    df_general = cube.slice(reliable=True).rename(columns=columns)
 
     fig = plot_general(df_general, COLORS["negative"], "Number of games released per year (with reliable vote)")
     st.plotly_chart(fig)
@@ -69,7 +68,7 @@ def show_quantity(df,COLORS):
     col1, col2 = st.columns([1,1])
 
     with col1:
-        df_general_novote = df.groupby("first_release_date").size().reset_index(name="number_of_games")
+        df_general_novote = cube.slice(rollup=True).rename(columns=columns)
         fig = plot_general(df_general_novote, COLORS["positive"], "Number of games released per year (with rating, reliable or not)")
         st.plotly_chart(fig)
 
@@ -86,29 +85,14 @@ def show_quantity(df,COLORS):
 
     col3, col4 = st.columns([1,1])
     with col3:
-        df_rating_genres = df[["first_release_date", "total_rating", "has_reliable_votes", "genres"]]
-        df_rating_genres = df_rating_genres[df_rating_genres["has_reliable_votes"] == True]
+        df_rating_genres = cube.share("is_indie", reliable=True).rename(columns={"year": "first_release_date", "share": "number_of_games_indie"})
 
-        df_rating_genres["genres"] = df_rating_genres["genres"].apply(lambda x: ast.literal_eval(x))
-        df_rating_genres["is_indie"] = df_rating_genres["genres"].apply(lambda x: "Indie" in x if isinstance(x, list) else False)
-        df_rating_genres = df_rating_genres.groupby(["first_release_date", "has_reliable_votes", "is_indie"]).size().reset_index(name="number_of_games_indie")
-
-        df_rating_genres = df_rating_genres.merge(df_general[["first_release_date", "number_of_games"]],on="first_release_date",how="left")
-        df_rating_genres["number_of_games_indie"] = (df_rating_genres["number_of_games_indie"] * 100) / df_rating_genres["number_of_games"]
-        
         fig = plot_by_indie(df_rating_genres, "Number of Indie games released per year in percentage (with reliable vote)")
         st.plotly_chart(fig)
     
     with col4: 
-        df_rating_genres_novote = df[["first_release_date", "total_rating", "has_reliable_votes", "genres"]]
-
-        df_rating_genres_novote["genres"] = df_rating_genres_novote["genres"].apply(lambda x: ast.literal_eval(x))
-        df_rating_genres_novote["is_indie"] = df_rating_genres_novote["genres"].apply(lambda x: "Indie" in x if isinstance(x, list) else False)
-        df_rating_genres_novote = df_rating_genres_novote.groupby(["first_release_date", "has_reliable_votes", "is_indie"]).size().reset_index(name="number_of_games_indie")
+        df_rating_genres_novote = cube.share("is_indie").rename(columns={"year": "first_release_date", "share": "number_of_games_indie"})
 
-        df_rating_genres_novote = df_rating_genres_novote.merge(df_general_novote[["first_release_date", "number_of_games"]],on="first_release_date",how="left")
-        df_rating_genres_novote["number_of_games_indie"] = (df_rating_genres_novote["number_of_games_indie"] * 100) / df_rating_genres_novote["number_of_games"]
-        
         fig = plot_by_indie(df_rating_genres_novote, "Number of Indie games released per year in percentage (with rating, reliable or not)")
         st.plotly_chart(fig)
 
@@ -181,18 +165,12 @@ def show_quantity(df,COLORS):
     }
 
     with col_cam_1:
-        df["genres"] = df["genres"].apply(lambda x: ast.literal_eval(x))
-        df_novote = df[df["has_reliable_votes"] == True]
-        df_genres = df_novote.explode("genres")
-        genre_counts = df_genres["genres"].value_counts().reset_index()
-        genre_counts.columns = ["genre", "count"]
+        genre_counts = cube.slice("genre", reliable=True, rollup=True, by_year=False)[["genre", "count"]].sort_values("count", ascending=False)
         fig = camemberg_genres(genre_counts,"Distribution of game Genres (with reliable vote)", genre_color_dict)
         st.plotly_chart(fig)
 
     with col_cam_2:
-        df_genres = df.explode("genres")
-        genre_counts = df_genres["genres"].value_counts().reset_index()
-        genre_counts.columns = ["genre", "count"]
+        genre_counts = cube.slice("genre", rollup=True, by_year=False)[["genre", "count"]].sort_values("count", ascending=False)
         fig = camemberg_genres(genre_counts,"Distribution of game Genres (with rating, reliable or not)", genre_color_dict)
         st.plotly_chart(fig)
 
@@ -233,15 +211,14 @@ def show_quantity(df,COLORS):
     col_cam_3, col_cam_4 = st.columns([1,1])
 
     with col_cam_3:
-        df_genres_reliable = df_genres[df_genres["has_reliable_votes"] == True]
-        genre_counts_year = (df_genres_reliable[df_genres_reliable["first_release_date"] == year_selected].groupby("genres").size().reset_index(name="count"))
-        genre_counts_year.columns = ["genre", "count"]
+        genre_counts_year = cube.slice("genre", reliable=True, rollup=True)
+        genre_counts_year = genre_counts_year[genre_counts_year["year"] == year_selected][["genre", "count"]]
         fig = camemberg_genres(genre_counts_year,f"Distribution of game Genres in {year_selected} (with reliable vote)",genre_color_dict)
         st.plotly_chart(fig)
 
     with col_cam_4:
-        genre_counts_year_all = (df_genres[df_genres["first_release_date"] == year_selected].groupby("genres").size().reset_index(name="count"))
-        genre_counts_year_all.columns = ["genre", "count"]
+        genre_counts_year_all = cube.slice("genre", rollup=True)
+        genre_counts_year_all = genre_counts_year_all[genre_counts_year_all["year"] == year_selected][["genre", "count"]]
         fig = camemberg_genres(genre_counts_year_all,f"Distribution of game Genres in {year_selected} (with rating, reliable or not)",genre_color_dict)
         st.plotly_chart(fig)
 
@@ -285,19 +262,9 @@ def show_quantity(df,COLORS):
     )
 
 
-    df_compar = df[["has_collections","has_reliable_votes","total_rating","dlcs"]]
-
-    conditions = [df["remake"] == True,df["remaster"] == True,df["early_access"] == True]
-    choices = ["has_remake", "has_remaster", "has_early_access"]
-    df_compar["special"] = np.select(conditions, choices, default="none")
-
-    bins = [0, 60, 75, 90, 100]
-    labels = ["<60", "60–74", "75–89", "90+"]
-    df_compar["total_rating"] = pd.cut(df["total_rating"], bins=bins, labels=labels)
-
-    bins_dlcs = [-1, 0, 1, 5, 10, 20, float("inf")] 
-    labels_dlcs = ["0", "1", "2–5", "6–10", "11–20", "20+"]
-    df_compar["dlcs"] = pd.cut(df_compar["dlcs"], bins=bins_dlcs, labels=labels_dlcs)
+    # Rating / DLC classes and special type are precomputed in the feature table
+    df_compar = data.view(["has_collections","has_reliable_votes","rating_bin","dlcs_bin","special"])
+    df_compar = df_compar.rename(columns={"rating_bin": "total_rating", "dlcs_bin": "dlcs"})
 
     fig = parallele_comp(df_compar)
     st.plotly_chart(fig)
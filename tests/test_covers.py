@@ -0,0 +1,157 @@
+## Cover cache against a local stand-in of the image server (no network needed)
+
+# Import the required libraries
+import io
+import os
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from PIL import Image
+
+import utils.covers as covers
+from utils.covers import CoverCache
+
+# Covers as stored in the data: no scheme, host replaced by the stand-in
+COVER = "//images.igdb.com/igdb/image/upload/t_cover_big/{}.jpg"
+# Seconds the stand-in waits before answering the "slow" cover
+SLOW = 1
+
+
+def jpeg(color, size=(500, 750)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class ImageServer(BaseHTTPRequestHandler):
+    """
+    Serves a JPEG for every cover, except "missing" (404) and "slow"
+    (answers after SLOW seconds). Paths requested are kept in order.
+    """
+    requests = []
+
+    def do_GET(self):
+        ImageServer.requests.append(self.path)
+        name = os.path.basename(self.path).removesuffix(".jpg")
+        if name == "missing":
+            self.send_error(404)
+            return
+        if name == "slow":
+            time.sleep(SLOW)
+        body = jpeg((sum(map(ord, name)) % 256, 80, 160))
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ImageServer)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def cache(server, tmp_path):
+    ImageServer.requests.clear()
+    return CoverCache(directory=str(tmp_path), server=server)
+
+
+def fetches(name):
+    return sum(path.endswith(f"/{name}.jpg") for path in ImageServer.requests)
+
+
+def partial_files(cache):
+    return [name for name in os.listdir(cache.directory) if name.endswith(".partial")]
+
+
+def test_first_request_stores_a_thumbnail(cache):
+    path = cache.get(COVER.format("a"))
+    assert path is not None and os.path.dirname(path) == cache.directory
+    with Image.open(path) as image:
+        assert image.format == "JPEG"
+        assert image.width <= cache.size[0] and image.height <= cache.size[1]
+    assert fetches("a") == 1
+
+
+def test_second_request_is_a_cache_hit(cache):
+    first = cache.get(COVER.format("a"))
+    second = cache.get(COVER.format("a"))
+    assert first == second
+    assert fetches("a") == 1
+
+
+def test_least_recently_used_are_evicted(cache):
+    a = cache.get(COVER.format("a"))
+    cache.max_bytes = int(2.5 * os.path.getsize(a))
+    b = cache.get(COVER.format("b"))
+    # Reading a makes b the least recently used one
+    time.sleep(0.01)
+    cache.get(COVER.format("a"))
+    c = cache.get(COVER.format("c"))
+    assert os.path.exists(a) and os.path.exists(c)
+    assert not os.path.exists(b)
+    assert cache.nbytes() <= cache.max_bytes
+
+
+def test_missing_cover_is_not_requested_again(cache, monkeypatch):
+    assert cache.get(COVER.format("missing")) is None
+    assert cache.get(COVER.format("missing")) is None
+    assert fetches("missing") == 1
+    # Tried again once RETRY_AFTER has passed
+    monkeypatch.setattr(covers, "RETRY_AFTER", 0)
+    assert cache.get(COVER.format("missing")) is None
+    assert fetches("missing") == 2
+
+
+def test_timeout_falls_back_and_backs_off(cache, monkeypatch):
+    monkeypatch.setattr(covers, "TIMEOUT", SLOW / 10)
+    assert cache.get(COVER.format("slow")) is None
+    assert cache.get(COVER.format("slow")) is None
+    assert fetches("slow") == 1
+    assert partial_files(cache) == []
+
+
+def test_failed_save_leaves_no_partial_file(cache, monkeypatch):
+    original = Image.Image.save
+
+    def save(image, fp, *args, **kwargs):
+        # Only the thumbnails fail, the stand-in still encodes its covers in memory
+        if not isinstance(fp, str):
+            return original(image, fp, *args, **kwargs)
+        with open(fp, "wb") as f:
+            f.write(b"half a thumbnail")
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(Image.Image, "save", save)
+    assert cache.get(COVER.format("a")) is None
+    assert partial_files(cache) == []
+    assert os.listdir(cache.directory) == []
+
+
+def test_decompression_bomb_falls_back(cache, monkeypatch):
+    # Any cover of the stand-in is more than twice this size
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    assert cache.get(COVER.format("a")) is None
+    assert partial_files(cache) == []
+
+
+def test_prefetched_covers_are_ready_when_shown(cache):
+    # The covers of the next random games are downloaded in the background
+    upcoming = [COVER.format(name) for name in ("r1", "r2", "r3")]
+    cache.prefetch(upcoming)
+    deadline = time.monotonic() + 10
+    while not all(os.path.exists(cache.path(cover)) for cover in upcoming):
+        assert time.monotonic() < deadline, "prefetch did not finish"
+        time.sleep(0.05)
+    for cover in upcoming:
+        assert cache.get(cover) == cache.path(cover)
+    assert [fetches(name) for name in ("r1", "r2", "r3")] == [1, 1, 1]
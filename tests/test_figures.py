@@ -0,0 +1,115 @@
+## Charts of the Ratings page: memory of repeated draws, and draws from several sessions at once
+
+# Import the required libraries
+import gc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from utils.figures import FigureCache
+from utils.visualisation_quality import (
+    plot_average_rating,
+    plot_average_rating_collection,
+    plot_average_rating_genre,
+    plot_average_rating_companies_exclu,
+    plot_top10,
+)
+
+# Number of draws measured once the caches of matplotlib and seaborn are warm
+DRAWS = 250
+WARM_UP = 50
+# Growth of the peak memory allowed over the measured draws (a leaked
+# figure holds about 1.5 MB, so a leak grows it by more than 350 MB)
+MAX_GROWTH_MB = 64
+# Sessions drawing at the same time, and draws of each chart among them
+THREADS = 16
+DRAWS_PER_CHART = 16
+
+YEARS = np.arange(2000, 2026)
+
+
+def mean_by_year(flag=None):
+    """
+    Average ratings per year and reliability, as read from the cube
+    (and per value of flag when given).
+    """
+    n = 4 * len(YEARS)
+    rows = {
+        "year": np.repeat(YEARS, 4),
+        "has_reliable_votes": np.tile([True, True, False, False], len(YEARS)),
+        "average_rating": np.linspace(60, 85, n),
+    }
+    if flag is not None:
+        rows[flag] = np.tile([True, False], n // 2)
+    return pd.DataFrame(rows)
+
+
+def top_rated():
+    return pd.DataFrame({
+        "name": [f"Game {i}" for i in range(20)],
+        "total_rating": np.linspace(99, 80, 20).round(2),
+        "has_reliable_votes": [True, False] * 10,
+    })
+
+
+# The five charts of the page: (plot function, data, other arguments)
+CHARTS = [
+    (plot_average_rating, mean_by_year, (False,)),
+    (plot_average_rating_collection, lambda: mean_by_year("has_collections"), (False,)),
+    (plot_average_rating_genre, lambda: mean_by_year("is_indie"), (True,)),
+    (plot_average_rating_companies_exclu, lambda: mean_by_year("is_exclu"), ("Nintendo", False)),
+    (plot_top10, top_rated, ("flare", False)),
+]
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    # seaborn warns about palettes without hue on some versions
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+def peak_rss_mb():
+    resource = pytest.importorskip("resource")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def test_draws_do_not_accumulate_figures():
+    for i in range(WARM_UP):
+        plot, rows, args = CHARTS[i % len(CHARTS)]
+        plot(rows(), *args)
+    gc.collect()
+    before = peak_rss_mb()
+
+    for i in range(DRAWS):
+        plot, rows, args = CHARTS[i % len(CHARTS)]
+        plot(rows(), *args)
+        # Built outside pyplot: nothing is registered, nothing waits for plt.close
+        assert plt.get_fignums() == []
+    gc.collect()
+
+    assert peak_rss_mb() - before < MAX_GROWTH_MB
+
+
+def test_concurrent_draws_match_serial_draws():
+    rc_params = dict(matplotlib.rcParams)
+    figures = FigureCache(directory=None)
+
+    def draw(chart):
+        plot, rows, args = CHARTS[chart]
+        return chart, figures.draw(plot, rows, *args)
+
+    serial = dict(draw(chart) for chart in range(len(CHARTS)))
+    with ThreadPoolExecutor(THREADS) as pool:
+        drawn = list(pool.map(draw, [i % len(CHARTS) for i in range(DRAWS_PER_CHART * len(CHARTS))]))
+
+    # The style is applied per figure: no session changes the charts of another
+    differing = [chart for chart, image in drawn if image != serial[chart]]
+    assert differing == []
+    assert dict(matplotlib.rcParams) == rc_params
@@ -0,0 +1,96 @@
+## Filters of the map page explorer against the row-by-row filters they replaced
+
+# Import the required libraries
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dataset import Dataset
+from utils.platforms import PlatformCatalogue, platform_counts
+from utils.query import Query
+
+# Platforms of the synthetic games: family and generation
+PLATFORMS = {
+    "PlayStation 2": ("PlayStation", 6),
+    "PlayStation 3": ("PlayStation", 7),
+    "PlayStation 4": ("PlayStation", 8),
+    "PlayStation 5": ("PlayStation", 9),
+    "PlayStation Portable": ("PlayStation", 7),
+    "PlayStation Vita": ("PlayStation", 8),
+    "Wii": ("Nintendo", 7),
+    "Wii U": ("Nintendo", 8),
+    "Switch": ("Nintendo", 9),
+    "Nintendo DS": ("Nintendo", 7),
+    "Nintendo 3DS": ("Nintendo", 8),
+    "Xbox 360": ("Xbox", 7),
+    "Xbox One": ("Xbox", 8),
+    "PC": ("Windows", 0),
+}
+
+
+@pytest.fixture(scope="module")
+def games():
+    rng = np.random.default_rng(0)
+    names = list(PLATFORMS)
+    rows = []
+    for _ in range(3000):
+        game_platforms = list(rng.choice(names, size=rng.integers(1, 4), replace=False))
+        rows.append({
+            "platforms": game_platforms,
+            "platform_family": [PLATFORMS[p][0] for p in game_platforms],
+            "generation_platform": max(PLATFORMS[p][1] for p in game_platforms),
+            "has_reliable_votes": bool(rng.integers(2)),
+        })
+    return pd.DataFrame(rows)
+
+
+def baseline(games, family, exclusive, pc, platform, cross_generation):
+    """
+    Platform filters of the map page before the query engine, row by row.
+    """
+    families, platforms = games["platform_family"], games["platforms"]
+    if exclusive and pc:
+        keep = families.apply(lambda lst: set(lst) == {family} or set(lst) == {family, "Windows"})
+    elif exclusive:
+        keep = families.apply(lambda lst: set(lst) == {family})
+    else:
+        keep = families.apply(lambda lst: family in lst)
+    if cross_generation and pc:
+        keep &= platforms.apply(lambda lst: platform in lst or "PC" in lst)
+    elif cross_generation:
+        keep &= platforms.apply(lambda lst: platform in lst)
+    elif pc:
+        keep &= platforms.apply(lambda lst: set(lst) == {platform} or set(lst) == {platform, "PC"})
+    else:
+        keep &= platforms.apply(lambda lst: set(lst) == {platform})
+    return keep.to_numpy()
+
+
+@pytest.mark.parametrize("platform", [p for p, (family, _) in PLATFORMS.items() if family != "Windows"])
+def test_platform_mask_matches_baseline(games, platform):
+    data = Dataset(games, "test")
+    family = PLATFORMS[platform][0]
+    for exclusive, pc, cross_generation in itertools.product([False, True], repeat=3):
+        if pc and not exclusive:
+            # The page only offers PC releases with "Only exclu?"
+            continue
+        query = Query(family=family, exclusive=exclusive, pc=pc, platform=platform, cross_generation=cross_generation)
+        expected = baseline(games, family, exclusive, pc, platform, cross_generation)
+        assert (query.mask(data) == expected).all(), (exclusive, pc, cross_generation)
+
+
+def test_cross_generation_keeps_games_of_the_platform(games):
+    data = Dataset(games, "test")
+    mask = Query(family="PlayStation", platform="PlayStation 4", cross_generation=True).mask(data)
+    assert mask.any()
+    assert games["platforms"][mask].apply(lambda lst: "PlayStation 4" in lst).all()
+
+
+def test_other_generations_are_adjacent_in_the_same_line(games):
+    catalogue = PlatformCatalogue(platform_counts(games))
+    assert sorted(catalogue.other_generations("PlayStation 4")) == ["PlayStation 3", "PlayStation 5"]
+    assert catalogue.other_generations("PlayStation Vita") == ["PlayStation Portable"]
+    assert catalogue.other_generations("Nintendo 3DS") == ["Nintendo DS"]
+    assert catalogue.other_generations("PlayStation 4", exclude={"PlayStation 5"}) == ["PlayStation 3"]
+    assert catalogue.other_generations("Unknown") == []
@@ -0,0 +1,32 @@
+## Game title search: short queries against a scan of every title
+
+# Import the required libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.search import TitleSearch, SHORT_RESULTS, title_key
+
+WORDS = ["zelda", "mario", "halo", "doom", "pokémon", "kart", "quest", "legend", "x", "2", "ōkami", "wild"]
+
+
+@pytest.fixture(scope="module")
+def titles():
+    rng = np.random.default_rng(0)
+    return pd.Series([" ".join(rng.choice(WORDS, size=rng.integers(1, 5))) for _ in range(5000)])
+
+
+def scan(titles, query, k):
+    """
+    Shortest titles containing query, in row order among equal lengths.
+    """
+    keys = [title_key(title) for title in titles]
+    rows = [row for row, key in enumerate(keys) if query in key]
+    return sorted(rows, key=lambda row: len(keys[row]))[:k]
+
+
+@pytest.mark.parametrize("query", ["a", "x", "2", "ze", "o", "ok", "Ō", "k ", "zz", "q"])
+def test_short_queries_match_a_scan(titles, query):
+    search = TitleSearch(titles)
+    for k in (1, 10, SHORT_RESULTS):
+        assert search.search(query, k).tolist() == scan(titles, title_key(query), k)
@@ -0,0 +1,61 @@
+## Country names -> ISO 3166 alpha-3 codes used by the maps, resolved at ingest
+
+# Import the required libraries
+import re
+import csv
+
+# pycountry is only needed to build the feature table, never by the pages
+try:
+    import pycountry
+except ImportError:
+    pycountry = None
+
+# Codes of the names pycountry does not know (typos of the notebook rules,
+# former names, "Unknown(N)" countries of the export)
+FALLBACK_PATH = "data/country_iso.csv"
+
+_fallback = None
+
+
+def load_fallback(path=FALLBACK_PATH):
+    """
+    Fallback table {country: iso_alpha}, read once per process.
+    """
+    global _fallback
+    if _fallback is None:
+        with open(path, newline="", encoding="utf-8") as f:
+            _fallback = {row["country"]: row["iso_alpha"] for row in csv.DictReader(f)}
+    return _fallback
+
+
+def resolve_iso(name):
+    """
+    ISO alpha-3 code of a country name, None when it cannot be resolved.
+    """
+    if name is None:
+        return None
+    fallback = load_fallback()
+    if name in fallback:
+        return fallback[name]
+    if pycountry is None:
+        return None
+    try:
+        return pycountry.countries.lookup(name).alpha_3
+    except LookupError:
+        pass
+    # "Unknown(N)": N is the ISO numeric code IGDB could not name
+    numeric = re.fullmatch(r"Unknown\((\d+)\)", name)
+    if numeric:
+        country = pycountry.countries.get(numeric=numeric.group(1).zfill(3))
+        return country.alpha_3 if country is not None else None
+    return None
+
+
+def iso_codes(column):
+    """
+    ISO codes of a column of country lists (same shape), each distinct
+    country name being resolved only once.
+    """
+    names = {name for countries in column for name in countries}
+    codes = {name: resolve_iso(name) for name in names}
+    return [[codes[name] for name in countries] for countries in column]
@@ -0,0 +1,73 @@
+## Number of games per country, year, role (developer / publisher) and reliability (map page)
+
+# Import the required libraries
+import pandas as pd
+
+
+class CountryStore:
+    """
+    Counts of games per (year, has_reliable_votes, country, iso_alpha, type),
+    type being "developer" or "publisher". Both maps of the page and their
+    totals are slices of this table, which only has a few rows per country.
+    """
+
+    def __init__(self, df, features):
+        """
+        Parameters:
+        - df: games DataFrame
+        - features: feature table of the games (year, developer_iso, publisher_iso)
+        """
+        parts = []
+        for role in ("developer", "publisher"):
+            countries = pd.DataFrame({
+                "year": features["year"],
+                "has_reliable_votes": df["has_reliable_votes"],
+                "country": df[f"{role}_country"],
+                "iso_alpha": features[f"{role}_iso"],
+            })
+            countries = countries.explode(["country", "iso_alpha"]).assign(type=role)
+            parts.append(countries)
+        # Countries without name or ISO code cannot be placed on a map
+        countries = pd.concat(parts, ignore_index=True).dropna(subset=["country", "iso_alpha"])
+
+        self._counts = (
+            countries.groupby(["year", "has_reliable_votes", "country", "iso_alpha", "type"])
+            .size()
+            .reset_index(name="count")
+        )
+        self._slices = {}
+
+    def slice(self, reliable_only=True, by_year=False):
+        """
+        Returns one row per country (and per year if by_year) with the number
+        of games of its developers, of its publishers and their total.
+
+        Parameters:
+        - reliable_only: if True, only the games with reliable votes are counted
+        - by_year: if True, one row per (country, year), sorted by year
+        """
+        key = (reliable_only, by_year)
+        if key not in self._slices:
+            self._slices[key] = self._slice(reliable_only, by_year)
+        # Shallow copy: with copy-on-write the caller can modify it freely
+        return self._slices[key].copy(deep=False)
+
+    def _slice(self, reliable_only, by_year):
+        counts = self._counts
+        if reliable_only:
+            counts = counts[counts["has_reliable_votes"] == True]
+
+        group = ["country", "iso_alpha", "type"]
+        pivot_index = ["country", "iso_alpha"]
+        if by_year:
+            group.append("year")
+            pivot_index.append("year")
+        counts = counts.groupby(group)["count"].sum().reset_index()
+
+        # We need total sum of developer + publisher
+        table = counts.pivot_table(index=pivot_index, columns="type", values="count", fill_value=0).reset_index()
+        table["total"] = table["developer"] + table["publisher"]
+
+        if by_year:
+            table = table.sort_values("year").reset_index(drop=True)
+        return table
@@ -0,0 +1,138 @@
+## Local cache of the game covers: downloaded once, stored as thumbnails, least recently used evicted
+
+# Import the required libraries
+import os
+import io
+import hashlib
+import time
+import threading
+import urllib.request
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# Cover of the games without one (set at ingest)
+DEFAULT_COVER = "https://i.imgur.com/VsWBrKg.jpeg"
+# Thumbnails written by the app (one JPEG per cover URL)
+COVER_DIR = "data/covers"
+# Size on disk above which the least recently used thumbnails are deleted
+MAX_CACHE_BYTES = int(os.environ.get("COVER_CACHE_MB", "200")) * 1024 * 1024
+# Largest side of a thumbnail (the cards show covers 250 pixels wide)
+THUMBNAIL_SIZE = (250, 375)
+# Server the covers are fetched from instead of their own host (e.g. a local
+# stand-in such as "http://127.0.0.1:8000" when working offline)
+COVER_SERVER = os.environ.get("COVER_SERVER")
+TIMEOUT = 5
+# Seconds before a cover that could not be downloaded is tried again
+RETRY_AFTER = 600
+PREFETCH_WORKERS = 4
+
+
+def cover_url(cover, server=COVER_SERVER):
+    """
+    Full URL of a cover ("//images.igdb.com/..." has no scheme in the data).
+
+    Parameters:
+    - cover: value of the "cover" column
+    - server: if set, scheme and host replacing the ones of the cover
+    """
+    url = "https:" + cover if cover.startswith("//") else cover
+    if server:
+        url = server.rstrip("/") + urlsplit(url).path
+    return url
+
+
+class CoverCache:
+    """
+    Thumbnails of the covers on disk, shared by every session of the process.
+    A cover is downloaded on its first request only; reading a thumbnail
+    refreshes its date, so the eviction drops the least recently used ones.
+    """
+
+    def __init__(self, directory=COVER_DIR, max_bytes=MAX_CACHE_BYTES, server=COVER_SERVER, size=THUMBNAIL_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.server = server
+        self.size = size
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        self._failures = {}
+        self._sizes = {
+            entry.path: entry.stat().st_size
+            for entry in os.scandir(directory) if entry.name.endswith(".jpg")
+        }
+
+    def path(self, cover):
+        name = hashlib.sha1(cover_url(cover, self.server).encode()).hexdigest()[:20]
+        return os.path.join(self.directory, name + ".jpg")
+
+    def nbytes(self):
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, cover):
+        """
+        Local path of the thumbnail of a cover, downloaded if needed.
+        Returns None if the cover cannot be downloaded or read.
+        """
+        path = self.path(cover)
+        try:
+            os.utime(path)
+            with self._lock:
+                self._sizes.setdefault(path, os.path.getsize(path))
+            return path
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            if time.monotonic() - self._failures.get(path, -RETRY_AFTER) < RETRY_AFTER:
+                return None
+        # Written next to its final name first: a reader never sees half a file
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        try:
+            with urllib.request.urlopen(cover_url(cover, self.server), timeout=TIMEOUT) as response:
+                image = Image.open(io.BytesIO(response.read()))
+                image.thumbnail(self.size)
+                image.convert("RGB").save(partial, "JPEG", quality=85)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Download, decoding or disk error: the page shows the remote cover instead
+            try:
+                os.remove(partial)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._failures[path] = time.monotonic()
+            return None
+        os.replace(partial, path)
+
+        with self._lock:
+            self._sizes[path] = os.path.getsize(path)
+        self.evict()
+        return path
+
+    def prefetch(self, covers):
+        """
+        Downloads the covers in the background (e.g. of the next games shown).
+        """
+        for cover in covers:
+            self._pool.submit(self.get, cover)
+
+    def evict(self):
+        """
+        Deletes the least recently used thumbnails until the cache fits in max_bytes.
+        """
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            by_age = sorted(self._sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in by_age:
+                if total <= self.max_bytes:
+                    break
+                total -= self._sizes.pop(path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,97 @@
+## Pre-aggregated counts and ratings per year, reliability and dimension (quantity and notes pages)
+
+# Import the required libraries
+import pandas as pd
+
+# Grouping sets computed at load (always together with year and has_reliable_votes)
+GROUPING_SETS = [
+    (),
+    ("has_collections",),
+    ("is_indie",),
+    ("genre",),
+    ("platform_family", "is_exclu"),
+]
+
+
+class AggregateCube:
+    """
+    Number of games and rating sums for every grouping set of GROUPING_SETS,
+    split by year and has_reliable_votes, plus their rollups over
+    has_reliable_votes. A chart only reads a slice of a few hundred rows.
+    """
+
+    def __init__(self, df, features):
+        """
+        Parameters:
+        - df: games DataFrame
+        - features: feature table of the games (year, is_indie, is_exclu)
+        """
+        base = pd.DataFrame({
+            "year": features["year"],
+            "has_reliable_votes": df["has_reliable_votes"],
+            "total_rating": df["total_rating"],
+            "has_collections": df["has_collections"],
+            "is_indie": features["is_indie"],
+            "is_exclu": features["is_exclu"],
+        })
+
+        # One row per (game, genre), like DataFrame.explode
+        genres = base.join(df["genres"].explode().rename("genre"), how="inner")
+        # One row per (game, distinct platform family)
+        families = df["platform_family"].explode().dropna().rename("platform_family")
+        families = families.rename_axis("row").reset_index().drop_duplicates().set_index("row")
+        families = base.join(families, how="inner")
+
+        self._tables = {}
+        self._slices = {}
+        for dims in GROUPING_SETS:
+            source = genres if "genre" in dims else families if "platform_family" in dims else base
+            split = (
+                source.groupby(["year", "has_reliable_votes", *dims])["total_rating"]
+                .agg(count="size", rating_sum="sum", rating_n="count")
+                .reset_index()
+            )
+            rollup = split.groupby(["year", *dims])[["count", "rating_sum", "rating_n"]].sum().reset_index()
+            self._tables[dims] = (split, rollup)
+
+    def slice(self, *dims, reliable=None, rollup=False, by_year=True):
+        """
+        Returns the counts ("count") and average ratings ("mean") of a grouping set.
+
+        Parameters:
+        - dims: dimensions of the grouping set (e.g. "is_indie")
+        - reliable: True / False keeps only that reliability, None keeps both
+        - rollup: if True, sums over has_reliable_votes
+        - by_year: if False, also sums over the years
+        """
+        key = (tuple(dims), reliable, rollup, by_year)
+        if key not in self._slices:
+            self._slices[key] = self._slice(dims, reliable, rollup, by_year)
+        # Shallow copy: with copy-on-write the caller can modify it freely
+        return self._slices[key].copy(deep=False)
+
+    def _slice(self, dims, reliable, rollup, by_year):
+        split, rolled = self._tables[tuple(dims)]
+        table = rolled if rollup and reliable is None else split
+        if reliable is not None:
+            table = table[table["has_reliable_votes"] == reliable]
+            if rollup:
+                table = table.drop(columns="has_reliable_votes")
+
+        keys = [c for c in table.columns if c not in ("count", "rating_sum", "rating_n")]
+        if not by_year:
+            keys.remove("year")
+            table = table.groupby(keys)[["count", "rating_sum", "rating_n"]].sum().reset_index()
+
+        table = table.assign(mean=table["rating_sum"] / table["rating_n"])
+        return table[keys + ["count", "mean"]].reset_index(drop=True)
+
+    def share(self, *dims, reliable=None):
+        """
+        Percentage of the games of each year falling in each group of dims.
+        With reliable=None the total is all the games of the year.
+        """
+        groups = self.slice(*dims, reliable=reliable)
+        totals = self.slice(reliable=reliable, rollup=True)[["year", "count"]].rename(columns={"count": "total"})
+        groups = groups.merge(totals, on="year", how="left")
+        return groups.assign(share=groups["count"] * 100 / groups["total"])
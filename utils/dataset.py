@@ -0,0 +1,220 @@
+## The dataset shared by every session of the app (one instance per process)
+
+# Import the required libraries
+import threading
+import pandas as pd
+
+from utils.io import load_data, snapshot_version, file_lock, SNAPSHOT_PATH
+from utils.index import ListIndex
+from utils.search import NameSearch, TitleSearch
+from utils.query import QueryCache
+from utils.platforms import PlatformCatalogue, platform_counts, load_counts, write_counts, PLATFORMS_PATH
+from utils.features import build_features, load_features, write_features, FEATURES_PATH
+from utils.cube import AggregateCube
+from utils.country_store import CountryStore
+from utils.similar import SimilarGames, signatures, load_signatures, write_signatures, MINHASH_PATH
+from utils.memory import memory_report
+from utils.export import Exporter
+
+# Pages work on lazy copies of the shared frame: with copy-on-write, a column
+# written by a page is copied for that page only (always on from pandas 3.0)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+class Dataset:
+    """
+    Read-only games table. Pages never receive the shared frame itself,
+    only views of it, so nothing a page does can leak into another session.
+    Indexes and derived tables are built on first use, once: sessions asking
+    for one at the same time wait for the first build instead of repeating it.
+    """
+
+    def __init__(self, frame, version):
+        self._frame = frame
+        self.version = version
+        # Reentrant: some builds use others (features -> index, cube -> features)
+        self._lock = threading.RLock()
+        self._indexes = {}
+        self._searches = {}
+        self._titles = None
+        self._ids = None
+        self.exports = Exporter(self)
+        self._features = None
+        self._cube = None
+        self._countries = None
+        self._platforms = None
+        self._similar = None
+        self._queries = QueryCache(self)
+
+    def __len__(self):
+        return len(self._frame)
+
+    def view(self, columns=None):
+        """
+        Returns a cheap copy-on-write view of the games (optionally projected
+        on some columns, which may include feature columns), free to be
+        modified by the caller.
+        """
+        if columns is None:
+            return self._frame.copy(deep=False)
+        columns = list(columns)
+        games = [c for c in columns if c in self._frame.columns]
+        if len(games) == len(columns):
+            return self._frame[columns]
+        features = [c for c in columns if c not in self._frame.columns]
+        return pd.concat([self._frame[games], self.features[features]], axis=1)[columns]
+
+    @property
+    def features(self):
+        """
+        Derived columns (year, is_indie, exclusivity, mode and age flags, bins),
+        read from the feature table built at ingest when it matches this version.
+        """
+        if self._features is None:
+            with self._lock:
+                if self._features is None:
+                    features = load_features(self.version)
+                    if features is None:
+                        # One process builds and writes the table, the others read it
+                        with file_lock(FEATURES_PATH):
+                            features = load_features(self.version)
+                            if features is None:
+                                features = build_features(self._frame, self.index("genres"), self.index("platform_family"))
+                                write_features(features, self.version)
+                    self._features = features
+        return self._features
+
+    @property
+    def cube(self):
+        """
+        Counts and average ratings per year, reliability and dimension.
+        """
+        if self._cube is None:
+            with self._lock:
+                if self._cube is None:
+                    self._cube = AggregateCube(self._frame, self.features)
+        return self._cube
+
+    @property
+    def countries(self):
+        """
+        Counts per country, year, role (developer / publisher) and reliability.
+        """
+        if self._countries is None:
+            with self._lock:
+                if self._countries is None:
+                    self._countries = CountryStore(self._frame, self.features)
+        return self._countries
+
+    @property
+    def platforms(self):
+        """
+        Platform families, their platforms and generations, with game counts,
+        read from the catalogue built at ingest when it matches this version.
+        """
+        if self._platforms is None:
+            with self._lock:
+                if self._platforms is None:
+                    counts = load_counts(self.version)
+                    if counts is None:
+                        with file_lock(PLATFORMS_PATH):
+                            counts = load_counts(self.version)
+                            if counts is None:
+                                counts = platform_counts(self._frame)
+                                write_counts(counts, self.version)
+                    self._platforms = PlatformCatalogue(counts)
+        return self._platforms
+
+    @property
+    def titles(self):
+        """
+        Typo-tolerant search on the game titles (row positions, best first).
+        """
+        if self._titles is None:
+            with self._lock:
+                if self._titles is None:
+                    self._titles = TitleSearch(self._frame["name"])
+        return self._titles
+
+    @property
+    def similar_games(self):
+        """
+        MinHash LSH index of the games, read from the signatures built at
+        ingest when they match this version.
+        """
+        if self._similar is None:
+            with self._lock:
+                if self._similar is None:
+                    signature = load_signatures(self.version)
+                    if signature is None:
+                        with file_lock(MINHASH_PATH):
+                            signature = load_signatures(self.version)
+                            if signature is None:
+                                signature = signatures(self._frame)
+                                write_signatures(signature, self.version)
+                    self._similar = SimilarGames(signature, self._frame)
+        return self._similar
+
+    def row(self, game_id):
+        """
+        Row position of a game from its id (hash lookup, no scan of the games).
+        """
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None:
+                    self._ids = pd.Index(self._frame["id"])
+        return self._ids.get_loc(game_id)
+
+    def game(self, game_id):
+        """
+        Row of a game from its id.
+        """
+        return self._frame.iloc[self.row(game_id)]
+
+    def similar(self, game_id, k=5):
+        """
+        The k games closest to a game (genres, perspectives, modes, platforms,
+        developers), best first, with their Jaccard similarity.
+        """
+        nearest = self.similar_games.similar(self.row(game_id), k)
+        games = self._frame.iloc[nearest["row"]].copy(deep=False)
+        games["similarity"] = nearest["similarity"].to_numpy()
+        return games
+
+    def query(self, query):
+        """
+        Games matching a Query of the explorer (memoised by its options).
+        """
+        return self._queries.get(query)
+
+    def memory_report(self):
+        """
+        Bytes per column of the shared games, plain pandas types vs compact schema.
+        """
+        return memory_report(self._frame)
+
+    def index(self, column):
+        """
+        Inverted index of a list column (built on first use, then shared).
+        """
+        if column not in self._indexes:
+            with self._lock:
+                if column not in self._indexes:
+                    self._indexes[column] = ListIndex(self._frame[column])
+        return self._indexes[column]
+
+    def search(self, column):
+        """
+        Name search on a list column (e.g. companies), ranked by number of games.
+        """
+        if column not in self._searches:
+            with self._lock:
+                if column not in self._searches:
+                    self._searches[column] = NameSearch(self.index(column).counts)
+        return self._searches[column]
+
+
+def load_dataset(path=SNAPSHOT_PATH):
+    df = load_data(path)
+    return Dataset(df, snapshot_version(path))
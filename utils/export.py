@@ -0,0 +1,93 @@
+## Downloads of the games (gzip CSV or Parquet), built only when asked for
+
+# Import the required libraries
+import io
+import os
+import glob
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.io import is_list_column
+
+# Exports of the whole dataset, one file per format and dataset version
+EXPORT_DIR = "data/exports"
+# Format -> MIME type
+FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def write_export(df, target, fmt):
+    """
+    Writes games to a path or a binary buffer.
+
+    Parameters:
+    - df: games DataFrame
+    - target: file path or binary file object
+    - fmt: "csv.gz" or "parquet"
+    """
+    # List columns as Python lists: "['a', 'b']" in the CSV, and a Parquet
+    # file that any pandas reads back (no pd.ArrowDtype in its metadata)
+    df = df.assign(**{column: df[column].tolist() for column in df.columns if is_list_column(df[column])})
+    if fmt == "csv.gz":
+        df.to_csv(target, index=False, compression="gzip")
+    elif fmt == "parquet":
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), target)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+class Exporter:
+    """
+    Exports of a dataset. The whole dataset is written once per format and
+    dataset version to EXPORT_DIR and read back for every later download,
+    a selection of rows is written in memory when its download starts.
+    """
+
+    def __init__(self, data, directory=EXPORT_DIR):
+        self._data = data
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, fmt):
+        return os.path.join(self.directory, f"games-{self._data.version}.{fmt}")
+
+    def full(self, fmt):
+        """
+        Path of the export of the whole dataset, written on the first call.
+        """
+        path = self.path(fmt)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(self.directory, exist_ok=True)
+                # Exports of older versions are never downloaded again
+                for old in glob.glob(os.path.join(self.directory, f"games-*.{fmt}")):
+                    os.remove(old)
+                partial = f"{path}.{os.getpid()}.partial"
+                write_export(self._data.view(), partial, fmt)
+                os.replace(partial, path)
+        return path
+
+    def export(self, fmt, rows=None):
+        """
+        Bytes of the export of the dataset, or of some of its rows.
+
+        Parameters:
+        - fmt: "csv.gz" or "parquet"
+        - rows: row positions to export, in this order (every game when None)
+        """
+        if rows is None:
+            with open(self.full(fmt), "rb") as f:
+                return f.read()
+        buffer = io.BytesIO()
+        write_export(self._data.view().iloc[rows], buffer, fmt)
+        return buffer.getvalue()
+
+    def on_click(self, fmt, rows=None):
+        """
+        Callable for st.download_button: the export is only built when the
+        button is clicked, not on every rerun of the page.
+        """
+        return lambda: self.export(fmt, rows)
@@ -0,0 +1,113 @@
+## Derived columns shared by the pages, computed once per dataset version
+
+# Import the required libraries
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.index import ListIndex
+from utils.countries import iso_codes
+
+# Feature table written next to the games snapshot at ingest
+FEATURES_PATH = "data/features.parquet"
+# Bumped whenever columns are added to the feature table, older tables are rebuilt
+FEATURES_FORMAT = "2"
+
+SINGLE_PLAYER = "Single player"
+MULTIPLAYER_MODES = ["Multiplayer", "Co-operative"]
+
+# One-hot columns of the age classes
+AGE_COLUMNS = {
+    "age_everyone": "Everyone",
+    "age_child": "Child",
+    "age_teen": "Teen",
+    "age_young": "Young",
+    "age_18plus": "18+",
+}
+
+# Bins of the parallel comparison graph
+RATING_BINS = [0, 60, 75, 90, 100]
+RATING_LABELS = ["<60", "60–74", "75–89", "90+"]
+DLCS_BINS = [-1, 0, 1, 5, 10, 20, float("inf")]
+DLCS_LABELS = ["0", "1", "2–5", "6–10", "11–20", "20+"]
+
+
+def build_features(df, genres=None, families=None):
+    """
+    Computes every derived column used by the pages, aligned on the games.
+
+    Parameters:
+    - df: games DataFrame (list columns already decoded)
+    - genres, families: optional ListIndex of "genres" / "platform_family" to reuse
+    """
+    if genres is None:
+        genres = ListIndex(df["genres"])
+    if families is None:
+        families = ListIndex(df["platform_family"])
+    modes = ListIndex(df["game_modes"])
+
+    features = pd.DataFrame(index=df.index)
+    features["year"] = df["first_release_date"].dt.year
+    features["is_indie"] = genres.contains("Indie")
+    # Released on a single platform family
+    features["is_exclu"] = families.n_distinct == 1
+
+    # Game modes
+    n_modes = np.fromiter(map(len, df["game_modes"]), dtype=np.int64, count=len(df))
+    first_mode = np.array([m[0] if len(m) else None for m in df["game_modes"]], dtype=object)
+    features["has_single_player"] = (n_modes == 1) & (first_mode == SINGLE_PLAYER)
+    features["has_multi"] = (n_modes == 1) & np.isin(first_mode, MULTIPLAYER_MODES)
+    features["has_both"] = (n_modes >= 2) & modes.contains_any([SINGLE_PLAYER] + MULTIPLAYER_MODES)
+    # As on the original graph, only multiplayer modes exclude a mixed game from "other"
+    features["has_other"] = (
+        ~features["has_single_player"]
+        & ~features["has_multi"]
+        & ~((n_modes >= 2) & modes.contains_any(MULTIPLAYER_MODES))
+    )
+
+    # Age classes
+    for column, age in AGE_COLUMNS.items():
+        features[column] = (df["age_rattings"] == age).to_numpy()
+
+    # Parallel comparison: special type, rating and DLC classes
+    conditions = [df["remake"] == True, df["remaster"] == True, df["early_access"] == True]
+    choices = ["has_remake", "has_remaster", "has_early_access"]
+    features["special"] = np.select(conditions, choices, default="none")
+    features["rating_bin"] = pd.cut(df["total_rating"], bins=RATING_BINS, labels=RATING_LABELS)
+    features["dlcs_bin"] = pd.cut(df["dlcs"], bins=DLCS_BINS, labels=DLCS_LABELS)
+
+    # ISO alpha-3 code of every developer / publisher country (same lists)
+    features["developer_iso"] = iso_codes(df["developer_country"])
+    features["publisher_iso"] = iso_codes(df["publisher_country"])
+
+    return features
+
+
+def features_metadata(version):
+    return {b"dataset_version": version.encode(), b"features_format": FEATURES_FORMAT.encode()}
+
+
+def write_features(features, version, path=FEATURES_PATH):
+    table = pa.Table.from_pandas(features, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), **features_metadata(version)}
+    # Written next to path and moved over it: another process never reads half a file
+    partial = f"{path}.{os.getpid()}.partial"
+    pq.write_table(table.replace_schema_metadata(metadata), partial)
+    os.replace(partial, path)
+
+
+def load_features(version, path=FEATURES_PATH):
+    """
+    Reads the feature table if it was built from this version of the dataset,
+    returns None otherwise.
+    """
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if any(metadata.get(key) != value for key, value in features_metadata(version).items()):
+        return None
+    # Imported here: utils.io builds the feature table at ingest
+    from utils.io import table_to_frame
+    return table_to_frame(pq.read_table(path))
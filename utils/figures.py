@@ -0,0 +1,120 @@
+## Rendered charts of the Ratings page, drawn once per dataset version
+
+# Import the required libraries
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Size in memory above which the least recently used images are dropped
+MAX_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_MB", "64")) * 1024 * 1024
+# Optional second tier on disk (e.g. "data/figures"), shared by the app processes
+FIGURE_DIR = os.environ.get("FIGURE_CACHE_DIR")
+# Same options as st.pyplot, so a cached chart looks like a drawn one
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200}
+
+
+class FigureCache:
+    """
+    Images of the matplotlib charts, keyed by (chart id, plot function,
+    arguments, dataset version). A chart is drawn and saved on its first view
+    only: later views, from any session, return the saved bytes without
+    building its data or drawing anything.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, directory=FIGURE_DIR, fmt="png"):
+        """
+        Parameters:
+        - max_bytes: size of the images kept in memory
+        - directory: folder of the disk tier (no disk tier when None)
+        - fmt: "png" or "svg"
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.fmt = fmt
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._nbytes = 0
+
+    def nbytes(self):
+        with self._lock:
+            return self._nbytes
+
+    def path(self, key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f"{name}.{self.fmt}")
+
+    def render(self, chart, plot, rows, *args, version):
+        """
+        Image of plot(rows(), *args): PNG bytes, or SVG text.
+
+        Parameters:
+        - chart: id of the chart on its page (e.g. "top_collections"), two charts
+          drawn by the same plot function never share an image
+        - plot: plot function returning a matplotlib figure
+        - rows: callable returning the data of the chart (only called when it is drawn)
+        - args: other arguments of plot (hashable: palette, platform name, filters...)
+        - version: dataset version the data comes from
+        """
+        key = (chart, plot.__module__, plot.__qualname__, args, version, self.fmt)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        image = self._read(key)
+        if image is None:
+            image = self.draw(plot, rows, *args)
+            self._write(key, image)
+        self._store(key, image)
+        return image
+
+    def draw(self, plot, rows, *args):
+        """
+        Image of plot(rows(), *args), drawn now and not cached (see render).
+        """
+        fig = plot(rows(), *args)
+        buffer = io.BytesIO()
+        try:
+            fig.savefig(buffer, format=self.fmt, **SAVEFIG_OPTIONS)
+        finally:
+            # Only the image is kept: the artists are released now, not at the next garbage collection
+            fig.clear()
+        image = buffer.getvalue()
+        return image.decode("utf-8") if self.fmt == "svg" else image
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                image = f.read()
+        except FileNotFoundError:
+            return None
+        return image.decode("utf-8") if self.fmt == "svg" else image
+
+    def _write(self, key, image):
+        if not self.directory:
+            return
+        path = self.path(key)
+        # Written next to its final name first: a reader never sees half a file
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        with open(partial, "wb") as f:
+            f.write(image.encode("utf-8") if isinstance(image, str) else image)
+        os.replace(partial, path)
+
+    def _store(self, key, image):
+        with self._lock:
+            if key in self._images:
+                return
+            self._images[key] = image
+            self._nbytes += len(image)
+            # Least recently used first, the image just stored is always kept
+            while self._nbytes > self.max_bytes and len(self._images) > 1:
+                _, old = self._images.popitem(last=False)
+                self._nbytes -= len(old)
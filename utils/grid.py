@@ -0,0 +1,75 @@
+## Paginated table: sorting, column choice and page slicing are done here, only the page is sent
+
+# Import the required libraries
+import math
+import numpy as np
+import streamlit as st
+
+from utils.io import is_list_column
+
+# Rows per page offered to the user (the first one is the default)
+PAGE_SIZES = [50, 100, 250]
+NO_SORT = "(none)"
+
+
+def sortable_columns(df):
+    """
+    Columns that can be sorted: every column except the list columns.
+    """
+    return [column for column in df.columns if not is_list_column(df[column])]
+
+
+def sort_rows(df, rows, column, ascending=True):
+    """
+    Row positions reordered by the values of one column (missing values last).
+
+    Parameters:
+    - df: games DataFrame
+    - rows: row positions (numpy array), in their current order
+    - column: column to sort on
+    - ascending: sort order
+    """
+    values = df[column].iloc[rows].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, kind="stable").index.to_numpy()
+    return rows[order]
+
+
+def page_rows(rows, page, page_size):
+    """
+    Positions of page (starting at 1) and the number of pages.
+    """
+    n_pages = max(1, math.ceil(len(rows) / page_size))
+    page = min(max(page, 1), n_pages)
+    return rows[(page - 1) * page_size:page * page_size], page, n_pages
+
+
+def show_grid(df, key, rows=None):
+    """
+    Shows a page of df with controls to sort it, choose its columns and move
+    between pages. The whole table never leaves the server.
+
+    Parameters:
+    - df: games DataFrame (the rows are only read, never copied whole)
+    - key: prefix of the widget keys, unique on the page
+    - rows: row positions to show, in this order (all the rows when None)
+    """
+    rows = np.arange(len(df)) if rows is None else np.asarray(rows)
+
+    sort_col, order_col, size_col, page_col = st.columns([0.4, 0.2, 0.2, 0.2])
+    with sort_col:
+        sort_by = st.selectbox("Sort by:", [NO_SORT] + sortable_columns(df), key=f"{key}_sort")
+    with order_col:
+        descending = st.checkbox("Descending", key=f"{key}_desc", disabled=sort_by == NO_SORT)
+    with size_col:
+        page_size = st.selectbox("Rows per page:", PAGE_SIZES, key=f"{key}_size")
+    with page_col:
+        page = st.number_input("Page:", min_value=1, value=1, step=1, key=f"{key}_page")
+    columns = st.multiselect("Columns:", list(df.columns), default=list(df.columns), key=f"{key}_columns")
+
+    if sort_by != NO_SORT:
+        rows = sort_rows(df, rows, sort_by, ascending=not descending)
+    visible, page, n_pages = page_rows(rows, int(page), page_size)
+
+    st.dataframe(df.iloc[visible][columns or list(df.columns)])
+    start = (page - 1) * page_size
+    st.caption(f"Rows {min(start + 1, len(rows))}-{start + len(visible)} of {len(rows)} (page {page} of {n_pages})")
@@ -0,0 +1,111 @@
+## Inverted indexes on the list columns (genres, platforms, platform families, companies)
+
+# Import the required libraries
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class ListIndex:
+    """
+    Maps every value of a list column to the rows (games) containing it.
+
+    Like a roaring bitmap, each value keeps the cheapest container:
+    - frequent values: a bitmap packed 8 rows per byte (numpy.packbits)
+    - rare values: the sorted array of their row ids
+    Every query returns a boolean mask over all rows, so filters are combined
+    with & and | instead of scanning the lists row by row.
+    """
+
+    def __init__(self, column):
+        self.size = len(column)
+        stride = max(self.size, 1)
+
+        # (row, value) pairs, each value counted once per row
+        if isinstance(column.dtype, pd.ArrowDtype):
+            # Arrow lists: the values and their rows are read from the offsets, no Python list is built
+            lists = pa.array(column.array)
+            lists = lists.combine_chunks() if isinstance(lists, pa.ChunkedArray) else lists
+            values = pc.list_flatten(lists).to_numpy(zero_copy_only=False)
+            flat = pd.Series(values, index=pc.list_parent_indices(lists).to_numpy(), copy=False).dropna()
+        else:
+            flat = pd.Series(column.to_numpy(), copy=False).explode().dropna()
+        rows = flat.index.to_numpy(dtype=np.int64)
+        codes, uniques = pd.factorize(flat.to_numpy())
+        pairs = np.unique(codes.astype(np.int64) * stride + rows)
+        codes, rows = pairs // stride, pairs % stride
+
+        # Number of distinct values per row, needed for "exactly equals"
+        self.n_distinct = np.bincount(rows, minlength=self.size)
+
+        # Group the row ids by value (pairs are sorted by value, then by row)
+        counts = np.bincount(codes, minlength=len(uniques))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        self.counts = pd.Series(counts, index=pd.Index(uniques, dtype=object)).sort_values(ascending=False)
+
+        # A bitmap costs size / 8 bytes, a row id array 4 bytes per row
+        self._containers = {}
+        for code, value in enumerate(uniques):
+            value_rows = rows[bounds[code]:bounds[code + 1]].astype(np.int32)
+            if counts[code] * 32 > self.size:
+                mask = np.zeros(self.size, dtype=bool)
+                mask[value_rows] = True
+                self._containers[value] = np.packbits(mask)
+            else:
+                self._containers[value] = value_rows
+
+    def __contains__(self, value):
+        return value in self._containers
+
+    @property
+    def values(self):
+        """
+        Distinct values, most frequent first.
+        """
+        return self.counts.index.tolist()
+
+    def nbytes(self):
+        return sum(c.nbytes for c in self._containers.values()) + self.n_distinct.nbytes
+
+    def empty(self):
+        return np.zeros(self.size, dtype=bool)
+
+    def contains(self, value):
+        """
+        Rows whose list contains value.
+        """
+        container = self._containers.get(value)
+        if container is None:
+            return self.empty()
+        if container.dtype == np.uint8:
+            return np.unpackbits(container, count=self.size).view(bool)
+        mask = self.empty()
+        mask[container] = True
+        return mask
+
+    def contains_all(self, values):
+        mask = ~self.empty()
+        for value in set(values):
+            mask &= self.contains(value)
+        return mask
+
+    def contains_any(self, values):
+        mask = self.empty()
+        for value in set(values):
+            mask |= self.contains(value)
+        return mask
+
+    def equals(self, values):
+        """
+        Rows whose set of values is exactly set(values).
+        """
+        values = set(values)
+        return self.contains_all(values) & (self.n_distinct == len(values))
+
+    def equals_or_with(self, value, extra):
+        """
+        Rows whose set of values is {value} or {value, extra}
+        (e.g. a console exclusive that was also released on PC).
+        """
+        return self.equals({value}) | self.equals({value, extra})
@@ -0,0 +1,417 @@
+## Streaming ingest of the raw IGDB export (data/data.csv) into the typed snapshot
+## Same cleaning as data/preparation.ipynb, split in named stages applied chunk by chunk
+
+# Import the required libraries
+import os
+import csv
+import hashlib
+import inspect
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.io import SNAPSHOT_PATH, SNAPSHOT_FORMAT, LIST_COLUMNS, parse_list, apply_schema, file_version, table_to_frame, snapshot_schema
+from utils.index import ListIndex
+from utils.features import FEATURES_PATH, build_features, load_features, features_metadata
+from utils.covers import DEFAULT_COVER
+from utils.platforms import PLATFORMS_PATH, platform_counts, merge_counts, write_counts, load_counts
+from utils.similar import MINHASH_PATH, signatures, signature_frame, minhash_metadata, load_signatures
+
+# Raw export of creation_data_API.py
+RAW_PATH = "data/data.csv"
+# Country rules extracted from the notebook
+COUNTRY_FIXES_PATH = "data/country_fixes.csv"
+COMPANY_COUNTRIES_PATH = "data/company_countries.csv"
+# Output of every stage, reused while its inputs and code are unchanged
+CHECKPOINT_DIR = "data/checkpoints"
+
+# Games per chunk: peak memory depends on this, not on the size of the export
+CHUNK_SIZE = 20_000
+
+# Age rating systems, in the order used to break ties between age classes
+AGE_SYSTEMS = ["ACB", "CERO", "GRAC", "ESRB", "PEGI", "USK", "CLASS_IND"]
+# Systems whose ratings are numbers (3, 7, 12...) in the export
+NUMERIC_AGE_SYSTEMS = ["PEGI", "USK"]
+# Rating codes of every age class (a code listed twice keeps its first class)
+AGE_CLASSES = {
+    "Everyone": ["G", "A", "ALL", "E", 3.0, 0.0, "L"],
+    "Child": ["PG", "B", "ALL", "E10+", 7.0, 6.0, "10"],
+    "Teen": ["M", "C", "12+", "T", "12", 12.0],
+    "Young": ["MA 15+", "D", "15+", "M", 16.0, "14"],
+    "18+": ["R 18+", "RC", "Z", "19+", "AO", "RP", "EC", 18.0, "18"],
+}
+AGE_CODES = {}
+for age_class, codes in AGE_CLASSES.items():
+    for code in codes:
+        AGE_CODES.setdefault(code, age_class)
+
+# Platforms whose family is missing in the export
+PLATFORM_FAMILIES = {
+    "PC (Microsoft Windows)": "Windows",
+    "Amazon Fire TV": "Smart TV",
+    "Mac": "Apple",
+    "iOS": "Apple",
+    "Web Browser": "Online",
+}
+PLATFORM_NAMES = {"PC (Microsoft Windows)": "PC"}
+
+# Columns of the snapshot, in order
+COLUMNS = [
+    "id", "name", "first_release_date", "cover", "total_rating", "has_reliable_votes", "age_rattings",
+    "developer_company", "developer_country", "publisher_company", "publisher_country",
+    "platforms", "platform_family", "platform_type", "generation_platform",
+    "game_type", "game_modes", "player_perspectives", "genres",
+    "has_collections", "remake", "remaster", "early_access", "dlcs",
+]
+
+# Types forced when reading the export, so that every chunk is parsed the same way
+RAW_DTYPES = {
+    "id": "float64",
+    "name": str,
+    "first_release_date": str,
+    "cover": str,
+    "aggregated_rating": "float64",
+    "aggregated_rating_count": "float64",
+    "rating": "float64",
+    "rating_count": "float64",
+    "generation_platform": "float64",
+    "game_type": str,
+    "platform_type": str,
+    "game_engines": str,
+    "collections": str,
+    **{column: str for column in LIST_COLUMNS},
+    **{system: "float64" if system in NUMERIC_AGE_SYSTEMS else str for system in AGE_SYSTEMS},
+}
+
+
+def load_country_fixes(path=COUNTRY_FIXES_PATH):
+    """
+    Country codes IGDB could not name (e.g. "Unknown(36)") -> country.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["raw"]: row["country"] for row in csv.DictReader(f)}
+
+
+def load_company_countries(path=COMPANY_COUNTRIES_PATH):
+    """
+    Country of the companies whose country is missing, per role ("developer" / "publisher").
+    Returns {role: {company: (rank, country)}}: when a game lists several of
+    these companies, the first rule of the file wins.
+    """
+    rules = {"developer": {}, "publisher": {}}
+    with open(path, newline="", encoding="utf-8") as f:
+        for rank, row in enumerate(csv.DictReader(f)):
+            rules[row["role"]].setdefault(row["company"], (rank, row["country"]))
+    return rules
+
+
+# Rule files, loaded only by the stages that need them
+RULES = {
+    "country_fixes": (COUNTRY_FIXES_PATH, load_country_fixes),
+    "company_countries": (COMPANY_COUNTRIES_PATH, load_company_countries),
+}
+
+
+def lengths(column):
+    return np.fromiter(map(len, column), dtype=np.int64, count=len(column))
+
+
+## Stages: each one takes a chunk of the previous stage and returns the cleaned chunk
+
+def extract(raw):
+    """
+    Raw export -> typed columns (lists decoded, dates parsed, default cover).
+    """
+    chunk = pd.DataFrame(index=pd.RangeIndex(len(raw)))
+    for column in LIST_COLUMNS + ["collections"]:
+        chunk[column] = [parse_list(value) for value in raw[column]]
+
+    # IGDB id, when the export has one (otherwise filled from the game itself, see game_ids)
+    chunk["id"] = raw["id"].to_numpy() if "id" in raw.columns else np.nan
+    chunk["name"] = raw["name"].to_numpy()
+    chunk["first_release_date"] = pd.to_datetime(raw["first_release_date"]).to_numpy()
+    chunk["cover"] = raw["cover"].fillna(DEFAULT_COVER).to_numpy()
+    columns = ["aggregated_rating", "aggregated_rating_count", "rating", "rating_count", *AGE_SYSTEMS, "game_type"]
+    for column in columns:
+        chunk[column] = raw[column].to_numpy()
+    # PC and mobile games have no generation
+    chunk["generation_platform"] = raw["generation_platform"].fillna(0).to_numpy()
+    for column in ["remake", "remaster", "early_access", "dlcs"]:
+        chunk[column] = raw[column].astype(bool if column != "dlcs" else "int64").to_numpy()
+    return chunk
+
+
+def ratings(chunk):
+    """
+    total_rating is the mean of the critics and players ratings that exist.
+    A vote is reliable with both ratings, enough votes and outside VR.
+    """
+    critics, players = chunk["aggregated_rating"], chunk["rating"]
+    n_ratings = critics.notnull().astype(int) + players.notnull().astype(int)
+    chunk["total_rating"] = ((critics.fillna(0) + players.fillna(0)) / n_ratings).astype("float64")
+
+    too_few_votes = (chunk["aggregated_rating_count"].fillna(0) < 2) & (chunk["rating_count"].fillna(0) < 50)
+    virtual_reality = ListIndex(chunk["player_perspectives"]).contains("Virtual Reality")
+    chunk["has_reliable_votes"] = critics.notnull() & players.notnull() & ~too_few_votes & ~virtual_reality
+    return chunk.drop(columns=["aggregated_rating", "aggregated_rating_count", "rating", "rating_count"])
+
+
+def ages(chunk):
+    """
+    Most frequent age class among the rating systems of each game (ties go to
+    the first system of AGE_SYSTEMS), "Everyone" when no rating is known.
+    """
+    names = list(AGE_CLASSES)
+    # Class of each (game, system), -1 when unknown
+    codes = np.column_stack([
+        pd.Categorical(chunk[system].map(AGE_CODES), categories=names).codes
+        for system in AGE_SYSTEMS
+    ])
+    scores = np.empty((len(chunk), len(names)), dtype=np.int64)
+    for k in range(len(names)):
+        hits = codes == k
+        first = np.where(hits.any(axis=1), hits.argmax(axis=1), len(AGE_SYSTEMS))
+        scores[:, k] = hits.sum(axis=1) * (len(AGE_SYSTEMS) + 1) - first
+    best = np.array(names, dtype=object)[scores.argmax(axis=1)]
+    chunk["age_rattings"] = np.where((codes >= 0).any(axis=1), best, "Everyone")
+    return chunk.drop(columns=AGE_SYSTEMS)
+
+
+def companies(chunk):
+    """
+    A game without developer takes its publishers, and the other way round.
+    """
+    for target, source in (("developer", "publisher"), ("publisher", "developer")):
+        for kind in ("company", "country"):
+            target_column, source_column = f"{target}_{kind}", f"{source}_{kind}"
+            missing = (lengths(chunk[target_column]) == 0) & (lengths(chunk[source_column]) != 0)
+            chunk[target_column] = chunk[source_column].where(missing, chunk[target_column])
+    return chunk
+
+
+def fix_countries(game_companies, game_countries, fixes, rules):
+    game_countries = [fixes.get(c, c) for c in game_countries]
+    known = [c for c in game_countries if c is not None]
+    if known:
+        return known
+    matches = [rules[c] for c in game_companies if c in rules]
+    if matches:
+        return [min(matches)[1]] * len(game_countries)
+    return game_countries
+
+
+def countries(chunk, country_fixes, company_countries):
+    """
+    Names the "Unknown(N)" countries, drops the missing countries of a game
+    when another one is known, and otherwise fills them from its companies.
+    """
+    for role in ("developer", "publisher"):
+        rules = company_countries[role]
+        chunk[f"{role}_country"] = [
+            fix_countries(game_companies, game_countries, country_fixes, rules)
+            for game_companies, game_countries in zip(chunk[f"{role}_company"], chunk[f"{role}_country"])
+        ]
+    return chunk
+
+
+def platforms(chunk):
+    """
+    Renames "PC (Microsoft Windows)" to "PC", adds the families IGDB leaves
+    empty (Windows, Apple, Online...) at the position of their platform, and
+    drops the games that still have no platform family.
+    """
+    new_platforms, new_families = [], []
+    for game_platforms, game_families in zip(chunk["platforms"], chunk["platform_family"]):
+        game_families = list(game_families)
+        for i, platform in enumerate(game_platforms):
+            family = PLATFORM_FAMILIES.get(platform)
+            if family is not None and (len(game_families) <= i or game_families[i] != family):
+                game_families.insert(i, family)
+        new_platforms.append([PLATFORM_NAMES.get(p, p) for p in game_platforms])
+        new_families.append(game_families)
+    chunk["platforms"], chunk["platform_family"] = new_platforms, new_families
+    chunk["platform_type"] = [list(dict.fromkeys(types)) for types in chunk["platform_type"]]
+    return chunk[lengths(chunk["platform_family"]) > 0].reset_index(drop=True)
+
+
+def characteristics(chunk):
+    """
+    Unknown game modes and perspectives, collections as a flag, and drops the
+    games without genre. Returns the columns of the snapshot, typed.
+    """
+    chunk["game_modes"] = [modes if modes else ["unknown"] for modes in chunk["game_modes"]]
+    chunk["player_perspectives"] = [p if p else ["Unknown"] for p in chunk["player_perspectives"]]
+    chunk["has_collections"] = lengths(chunk["collections"]) > 0
+    chunk = chunk.loc[lengths(chunk["genres"]) > 0, COLUMNS].reset_index(drop=True)
+    return apply_schema(chunk)
+
+
+# Pipeline, in order: (name, function, rule files it reads)
+STAGES = [
+    ("extract", extract, []),
+    ("ratings", ratings, []),
+    ("ages", ages, []),
+    ("companies", companies, []),
+    ("countries", countries, ["country_fixes", "company_countries"]),
+    ("platforms", platforms, []),
+    ("characteristics", characteristics, []),
+]
+
+
+## Checkpoints
+
+def code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= code_names(const)
+    return names
+
+
+def fingerprint(function, seen=None):
+    """
+    Source of a function and of every function and constant of the app it
+    uses, so that editing a rule only changes the key of the stages using it.
+    """
+    seen = set() if seen is None else seen
+    seen.add(function)
+    parts = [inspect.getsource(function)]
+    for name in sorted(code_names(function.__code__)):
+        value = function.__globals__.get(name)
+        if inspect.isfunction(value):
+            if value.__module__.startswith("utils.") and value not in seen:
+                parts.append(fingerprint(value, seen))
+        elif name.isupper() and name in function.__globals__:
+            parts.append(f"{name} = {value!r}")
+    return "\n".join(parts)
+
+
+def stage_key(parent_key, name, function, rules):
+    """
+    Key of a stage output: its input (key of the previous stage or hash of
+    the export), its code and the content of its rule files.
+    """
+    digest = hashlib.sha1()
+    for part in [parent_key, name, fingerprint(function), *(file_version(RULES[r][0]) for r in rules)]:
+        digest.update(part.encode() + b"\0")
+    return digest.hexdigest()[:12]
+
+
+def stored_key(path, field=b"stage_key"):
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(field, b"").decode()
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield table_to_frame(pa.Table.from_batches([batch]))
+
+
+def chunk_schema(table, metadata):
+    """
+    Schema of a file written chunk by chunk, taken from its first chunk (list
+    columns are always lists of strings, even when a chunk only holds empty lists).
+    """
+    fields = [
+        pa.field(f.name, pa.list_(pa.string())) if pa.types.is_list(f.type) else f
+        for f in table.schema
+    ]
+    return pa.schema(fields, metadata={**(table.schema.metadata or {}), **metadata})
+
+
+def write_chunks(chunks, path, metadata, schema=chunk_schema):
+    """
+    Appends every chunk to a Parquet file (one row group per chunk). The file
+    is written next to path and replaces it only once complete.
+    Returns the number of rows written.
+
+    Parameters:
+    - schema: function(first table, metadata) giving the schema of the file
+    """
+    partial = path + ".partial"
+    writer = None
+    n_rows = 0
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(partial, schema(table, metadata))
+            writer.write_table(table.cast(writer.schema))
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"No game left to write in {path}")
+    os.replace(partial, path)
+    return n_rows
+
+
+def publish(checkpoint, key, snapshot_path, features_path, platforms_path, minhash_path, chunk_size):
+    """
+    Copies the last checkpoint to the snapshot read by the app, then writes
+    its feature table, platform catalogue and MinHash signatures. Skipped
+    when the snapshot already comes from this key.
+    """
+    if stored_key(snapshot_path, b"pipeline_key") == key and os.path.exists(features_path):
+        version = file_version(snapshot_path)
+        if (load_features(version, features_path) is not None and load_counts(version, platforms_path) is not None
+                and load_signatures(version, minhash_path) is not None):
+            return False
+    metadata = {b"snapshot_format": SNAPSHOT_FORMAT.encode(), b"pipeline_key": key.encode()}
+    # Same layout as write_snapshot: list columns dictionary-encoded
+    snapshot = lambda table, metadata: snapshot_schema(chunk_schema(table, metadata))
+    write_chunks(read_chunks(checkpoint, chunk_size), snapshot_path, metadata, snapshot)
+    version = file_version(snapshot_path)
+
+    # One pass over the snapshot for both: the catalogue adds up the counts of every chunk
+    counts = []
+    def features(chunk):
+        counts.append(platform_counts(chunk))
+        return build_features(chunk)
+    write_chunks((features(chunk) for chunk in read_chunks(snapshot_path, chunk_size)), features_path, features_metadata(version))
+    write_counts(merge_counts(counts), version, platforms_path)
+    # Signatures only depend on their own game: hashed chunk by chunk
+    chunks = (signature_frame(signatures(chunk)) for chunk in read_chunks(snapshot_path, chunk_size))
+    write_chunks(chunks, minhash_path, minhash_metadata(version))
+    return True
+
+
+def ingest_raw(raw_path=RAW_PATH, snapshot_path=SNAPSHOT_PATH, features_path=FEATURES_PATH,
+               platforms_path=PLATFORMS_PATH, minhash_path=MINHASH_PATH, chunk_size=CHUNK_SIZE, checkpoint_dir=CHECKPOINT_DIR):
+    """
+    Runs the stages on the raw export, chunk by chunk. Every stage is written
+    to checkpoint_dir, keyed by its input, code and rules: a stage whose key
+    is unchanged is reused, so editing one rule only recomputes the stages
+    from that rule on. Only one chunk is in memory at a time.
+    Returns {stage: True if recomputed, False if reused}, "publish" included.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    key = file_version(raw_path)
+    previous = None
+    computed = {}
+    for name, function, rules in STAGES:
+        key = stage_key(key, name, function, rules)
+        path = os.path.join(checkpoint_dir, f"{name}.parquet")
+        computed[name] = stored_key(path) != key
+        if computed[name]:
+            if previous is None:
+                chunks = pd.read_csv(raw_path, dtype=RAW_DTYPES, chunksize=chunk_size)
+            else:
+                chunks = read_chunks(previous, chunk_size)
+            loaded = {r: RULES[r][1](RULES[r][0]) for r in rules}
+            write_chunks((function(chunk, **loaded) for chunk in chunks), path, {b"stage_key": key.encode()})
+        previous = path
+
+    computed["publish"] = publish(previous, key, snapshot_path, features_path, platforms_path, minhash_path, chunk_size)
+    return computed
+
+
+if __name__ == "__main__":
+    for stage, recomputed in ingest_raw().items():
+        print(f"{stage}: {'computed' if recomputed else 'reused'}")
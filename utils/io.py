@@ -1,5 +1,336 @@
+import os
+import ast
+import contextlib
+import hashlib
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def load_data(path="data/games.csv"):
-    df = pd.read_csv(path)
-    return df
\ No newline at end of file
+# Only POSIX systems can lock a file: elsewhere processes may rebuild the same
+# file at the same time (still safe, every file is replaced atomically)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from utils.features import build_features, write_features
+from utils.platforms import platform_counts, write_counts
+from utils.similar import signatures, write_signatures
+
+# Cleaned data exported by data/preparation.ipynb
+CSV_PATH = "data/games.csv"
+# Typed columnar snapshot built from the CSV (schema stored in the file)
+SNAPSHOT_PATH = "data/games.parquet"
+# Bumped whenever the layout of the snapshot changes, older snapshots are rebuilt
+SNAPSHOT_FORMAT = "5"
+# Uncompressed Arrow copy of the snapshot, memory-mapped by every app process
+# (numbers, strings and list columns are views on the same physical pages,
+# opening it does not parse or copy them)
+MAPPED_PATH = "data/games.arrow"
+
+# The right data types, as narrow as the values allow
+# (repeated strings are categories, ratings need no float64 precision)
+SCHEMA = {
+    "name": "string",
+    "first_release_date": "datetime64[ns]",
+    "cover": "string",
+    "total_rating": "float32",
+    "has_reliable_votes": "bool",
+    "age_rattings": "category",
+    "generation_platform": "int8",
+    "game_type": "category",
+    "has_collections": "bool",
+    "remake": "bool",
+    "remaster": "bool",
+    "early_access": "bool",
+    "dlcs": "int16",
+}
+
+# Type of the list columns in the snapshot: every list item is a code in a
+# dictionary of the distinct names (a genre is stored once, not once per game)
+SNAPSHOT_LIST_TYPE = pa.list_(pa.dictionary(pa.int32(), pa.string()))
+
+# Columns stored as stringified Python lists in the CSV, decoded once at ingest
+LIST_COLUMNS = [
+    "developer_company",
+    "developer_country",
+    "publisher_company",
+    "publisher_country",
+    "platforms",
+    "platform_family",
+    "platform_type",
+    "game_modes",
+    "player_perspectives",
+    "genres",
+]
+
+
+def parse_list(value):
+    """
+    Decodes one cell of a list column. Anything that is not a list
+    (e.g. "Unknown" for missing companies) becomes an empty list.
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+        return value if isinstance(value, list) else []
+    return []
+
+
+def is_list_column(values):
+    """
+    True for a list column: Arrow lists (load_data) or Python lists (ingest).
+    """
+    if isinstance(values.dtype, pd.ArrowDtype):
+        return pa.types.is_list(values.dtype.pyarrow_dtype) or pa.types.is_large_list(values.dtype.pyarrow_dtype)
+    if values.dtype == object:
+        first = values.dropna().head(1)
+        return bool(len(first)) and isinstance(first.iloc[0], (list, tuple, np.ndarray))
+    return False
+
+
+def game_ids(df):
+    """
+    Stable id of every game: its IGDB id when the data has one, otherwise a
+    63-bit hash of its name, release date, cover, type and platforms (the
+    n-th copy of an identical game is hashed with n, so ids stay unique).
+    """
+    ids = df["id"] if "id" in df.columns else pd.Series(np.nan, index=df.index)
+    missing = ids.isna().to_numpy()
+    if not missing.any():
+        return ids.to_numpy(dtype=np.int64)
+
+    keys = pd.Series([
+        "|".join(map(str, values))
+        for values in zip(df["name"], df["first_release_date"], df["cover"], df["game_type"], df["platforms"])
+    ], index=df.index)
+    keys = keys + "|" + keys.groupby(keys).cumcount().astype(str)
+    hashes = [
+        int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big") >> 1
+        for key in keys[missing]
+    ]
+    result = np.zeros(len(df), dtype=np.int64)
+    result[~missing] = ids[~missing].to_numpy(dtype=np.int64)
+    result[missing] = hashes
+    return result
+
+
+def apply_schema(df):
+    """
+    Converts every known column of the raw CSV to its type in SCHEMA,
+    decodes the list columns into real Python lists and gives every game
+    its id (first column).
+    """
+    for column, dtype in SCHEMA.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = [parse_list(value) for value in df[column]]
+    ids = game_ids(df)
+    df = df.drop(columns="id", errors="ignore")
+    df.insert(0, "id", ids)
+    return df
+
+
+def build_snapshot(csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH):
+    """
+    Ingest step: parses the CSV once, applies the schema and writes the typed
+    Parquet snapshot that load_data reads back, along with its feature table,
+    platform catalogue and MinHash signatures.
+    """
+    df = apply_schema(pd.read_csv(csv_path))
+    write_snapshot(df, snapshot_path)
+    write_features(build_features(df), file_version(snapshot_path))
+    write_counts(platform_counts(df), file_version(snapshot_path))
+    write_signatures(signatures(df), file_version(snapshot_path))
+    return df
+
+
+def snapshot_schema(schema):
+    """
+    Schema of the snapshot: the list columns dictionary-encoded (SNAPSHOT_LIST_TYPE).
+    """
+    fields = [pa.field(f.name, SNAPSHOT_LIST_TYPE) if pa.types.is_list(f.type) else f for f in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def write_snapshot(df, snapshot_path=SNAPSHOT_PATH):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.cast(snapshot_schema(table.schema))
+    metadata = {**(table.schema.metadata or {}), b"snapshot_format": SNAPSHOT_FORMAT.encode()}
+    # Written next to the snapshot and moved over it: another process never reads half a file
+    partial = f"{snapshot_path}.{os.getpid()}.partial"
+    pq.write_table(table.replace_schema_metadata(metadata), partial)
+    os.replace(partial, snapshot_path)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on path + ".lock", shared by the processes of the host:
+    the first one rebuilds the file while the others wait, then read it.
+    The lock is released when its process exits, even on a crash.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def file_version(path):
+    """
+    Short content hash of the snapshot, used to key everything derived from it.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def snapshot_is_stale(csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH):
+    if not os.path.exists(snapshot_path):
+        return True
+    metadata = pq.read_schema(snapshot_path).metadata or {}
+    if metadata.get(b"snapshot_format") != SNAPSHOT_FORMAT.encode():
+        return True
+    return os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(snapshot_path)
+
+
+def load_data(path=SNAPSHOT_PATH, csv_path=CSV_PATH, mapped_path=MAPPED_PATH):
+    """
+    Loads the typed snapshot, no type coercion is needed after reading it.
+    The snapshot is (re)built from the CSV when missing or older than the CSV,
+    by one process at a time (see file_lock).
+    List columns stay Arrow lists (pd.ArrowDtype): a cell reads as a Python
+    list, but nothing is decoded when the snapshot is opened.
+
+    With mapped_path (None to read the Parquet file directly), the snapshot
+    is read from its memory-mapped Arrow copy, written on first use: the
+    string and list columns are then views on the mapped file.
+    """
+    # Checked again under the lock: another process may have rebuilt it meanwhile
+    if snapshot_is_stale(csv_path, path):
+        with file_lock(path):
+            if snapshot_is_stale(csv_path, path):
+                build_snapshot(csv_path, path)
+    if mapped_path is None:
+        return table_to_frame(pq.read_table(path), arrow_lists=True)
+    if mapped_is_stale(path, mapped_path):
+        with file_lock(mapped_path):
+            if mapped_is_stale(path, mapped_path):
+                write_mapped(path, mapped_path)
+    return table_to_frame(read_mapped(mapped_path), arrow_lists=True)
+
+
+def mapped_is_stale(snapshot_path=SNAPSHOT_PATH, mapped_path=MAPPED_PATH):
+    if not os.path.exists(mapped_path):
+        return True
+    if os.path.getmtime(mapped_path) < os.path.getmtime(snapshot_path):
+        return True
+    return mapped_metadata(mapped_path).get(b"snapshot_format") != SNAPSHOT_FORMAT.encode()
+
+
+def write_mapped(snapshot_path=SNAPSHOT_PATH, mapped_path=MAPPED_PATH):
+    """
+    Writes the uncompressed Arrow IPC copy of the snapshot, tagged with its
+    version. The file is replaced atomically: processes that still map the
+    previous one keep reading it until they reload.
+    """
+    table = pq.read_table(snapshot_path).unify_dictionaries()
+    metadata = {**(table.schema.metadata or {}), b"dataset_version": file_version(snapshot_path).encode()}
+    table = table.replace_schema_metadata(metadata)
+    partial = f"{mapped_path}.{os.getpid()}.partial"
+    with pa.ipc.new_file(partial, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(partial, mapped_path)
+
+
+def read_mapped(mapped_path=MAPPED_PATH):
+    """
+    Opens the Arrow copy of the snapshot without reading it: the columns are
+    views on the mapped file, paged in by the OS when first used.
+    """
+    return pa.ipc.open_file(pa.memory_map(mapped_path)).read_all()
+
+
+def mapped_metadata(mapped_path=MAPPED_PATH):
+    with pa.memory_map(mapped_path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def snapshot_version(path=SNAPSHOT_PATH, mapped_path=MAPPED_PATH):
+    """
+    Version of the snapshot (see file_version), read from its Arrow copy when
+    it is current so that no process has to hash the snapshot on start.
+    """
+    if mapped_path is not None and not mapped_is_stale(path, mapped_path):
+        version = mapped_metadata(mapped_path).get(b"dataset_version")
+        if version:
+            return version.decode()
+    return file_version(path)
+
+
+def arrow_dtype(arrow_type):
+    """
+    types_mapper of table_to_frame: strings and lists keep their Arrow buffers.
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def table_to_frame(table, arrow_lists=False):
+    """
+    Converts an Arrow table to a DataFrame. Fixed-width columns without
+    missing values and string columns are not copied (split_blocks), so a
+    frame read from a memory-mapped table keeps sharing its pages.
+
+    Parameters:
+    - table: Arrow table of games
+    - arrow_lists: if True, list columns are not copied either (pd.ArrowDtype);
+      otherwise they are decoded into Python lists (e.g. for the ingest stages,
+      which edit them)
+    """
+    if arrow_lists:
+        return table.to_pandas(split_blocks=True, types_mapper=arrow_dtype)
+    list_columns = [f.name for f in table.schema if pa.types.is_list(f.type) or pa.types.is_large_list(f.type)]
+    df = table.drop_columns(list_columns).to_pandas(split_blocks=True, types_mapper=arrow_dtype)
+    for column in list_columns:
+        df[column] = decode_lists(table.column(column))
+    return df[table.column_names]
+
+
+def decode_lists(column):
+    """
+    Python lists of a list column. Like a dictionary encoding, each distinct
+    value is decoded once and shared by every list containing it, instead of
+    one string object per occurrence.
+    """
+    array = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if len(array) == 0:
+        return []
+    encoded = pc.dictionary_encode(array.flatten())
+    # Missing values (e.g. an unknown country) get the last code: None
+    values = np.array(encoded.dictionary.to_pylist() + [None], dtype=object)
+    codes = pc.fill_null(encoded.indices, len(values) - 1).to_numpy()
+    bounds = np.cumsum(pc.fill_null(array.value_lengths(), 0).to_numpy())
+    return [part.tolist() for part in np.split(values[codes], bounds[:-1])]
+
+
+if __name__ == "__main__":
+    build_snapshot()
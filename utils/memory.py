@@ -0,0 +1,82 @@
+## Memory used by the games table, per column, compact schema vs plain pandas types
+
+# Import the required libraries
+import sys
+import pandas as pd
+
+from utils.io import load_data, is_list_column, SNAPSHOT_PATH
+
+
+def column_nbytes(values):
+    """
+    Bytes held by a column. For object columns, every distinct Python object
+    is counted once, so strings shared between rows or lists are not
+    counted twice (unlike memory_usage(deep=True)).
+    """
+    if values.dtype != object:
+        return int(values.memory_usage(index=False, deep=True))
+    seen = set()
+    total = values.memory_usage(index=False, deep=False)
+    for value in values:
+        items = value if isinstance(value, list) else [value]
+        if isinstance(value, list):
+            total += sys.getsizeof(value)
+        for item in items:
+            if id(item) not in seen:
+                seen.add(id(item))
+                total += sys.getsizeof(item)
+    return int(total)
+
+
+def plain_frame(df):
+    """
+    Same games with the types pandas picks by default: 64-bit numbers, Python
+    string objects instead of categories or Arrow strings, and one string
+    object per list item.
+    """
+    plain = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = pd.Series([v.encode().decode() for v in values.astype(str)], index=df.index, dtype=object)
+        elif isinstance(values.dtype, pd.StringDtype):
+            # Arrow-backed strings are already compact: one Python string per row instead
+            values = pd.Series([v.encode().decode() if isinstance(v, str) else v for v in values], index=df.index, dtype=object)
+        elif pd.api.types.is_bool_dtype(values.dtype):
+            pass
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype("int64")
+        elif pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype("float64")
+        elif values.dtype == object or is_list_column(values):
+            values = pd.Series(
+                [[v.encode().decode() if isinstance(v, str) else v for v in items] if isinstance(items, list) else items
+                 for items in values],
+                index=df.index, dtype=object,
+            )
+        plain[column] = values
+    return plain
+
+
+def memory_report(df=None):
+    """
+    Bytes per column of the games before (plain pandas types) and after the
+    compact schema, with a "total" row.
+
+    Parameters:
+    - df: games DataFrame as returned by load_data (loaded when None)
+    """
+    if df is None:
+        df = load_data(SNAPSHOT_PATH)
+    plain = plain_frame(df)
+    report = pd.DataFrame({
+        "before": [column_nbytes(plain[c]) for c in df.columns],
+        "after": [column_nbytes(df[c]) for c in df.columns],
+    }, index=pd.Index(df.columns, name="column"))
+    report.loc["total"] = report.sum()
+    report["saved_%"] = (100 * (1 - report["after"] / report["before"])).round(1)
+    return report
+
+
+if __name__ == "__main__":
+    print(memory_report().to_string())
@@ -0,0 +1,151 @@
+## Platform catalogue: family -> platforms -> generation, with game counts (built at ingest)
+
+# Import the required libraries
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Catalogue written next to the games snapshot at ingest
+PLATFORMS_PATH = "data/platforms.parquet"
+# Bumped whenever the layout of the catalogue changes, older ones are rebuilt
+PLATFORMS_FORMAT = "1"
+
+COUNT_COLUMNS = ["family", "platform", "generation"]
+
+# Portable consoles (IGDB names): a generation follows the one before it in
+# the same line, home consoles and portables being two lines of a family
+PORTABLE_PLATFORMS = {
+    "Game & Watch", "Game Boy", "Game Boy Color", "Game Boy Advance", "Pokémon mini",
+    "Nintendo DS", "Nintendo DSi", "Nintendo 3DS", "New Nintendo 3DS",
+    "PlayStation Portable", "PlayStation Vita",
+}
+
+
+def platform_counts(df):
+    """
+    Number of games per (family, platform, generation). Platforms are taken
+    from the games released on a single family, so a platform always belongs
+    to its own family. Rows without platform count every game of a family.
+    Counts of several chunks are combined by adding them (see merge_counts).
+
+    Parameters:
+    - df: games DataFrame (platforms, platform_family, generation_platform)
+    """
+    rows = []
+    for game_platforms, game_families, generation in zip(df["platforms"], df["platform_family"], df["generation_platform"]):
+        families = set(game_families)
+        for family in families:
+            rows.append((family, None, None))
+        if len(families) == 1:
+            for platform in set(game_platforms):
+                rows.append((next(iter(families)), platform, int(generation)))
+    counts = pd.DataFrame(rows, columns=COUNT_COLUMNS).astype({"generation": "Int8"})
+    return counts.groupby(COUNT_COLUMNS, dropna=False).size().reset_index(name="games")
+
+
+def merge_counts(counts):
+    """
+    Adds up the platform_counts of several chunks.
+    """
+    counts = pd.concat(counts, ignore_index=True)
+    return counts.groupby(COUNT_COLUMNS, dropna=False)["games"].sum().reset_index()
+
+
+def catalogue_metadata(version):
+    return {b"dataset_version": version.encode(), b"platforms_format": PLATFORMS_FORMAT.encode()}
+
+
+def write_counts(counts, version, path=PLATFORMS_PATH):
+    table = pa.Table.from_pandas(counts, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), **catalogue_metadata(version)}
+    # Written next to path and moved over it: another process never reads half a file
+    partial = f"{path}.{os.getpid()}.partial"
+    pq.write_table(table.replace_schema_metadata(metadata), partial)
+    os.replace(partial, path)
+
+
+def load_counts(version, path=PLATFORMS_PATH):
+    """
+    Reads the platform counts if they were built from this version of the
+    dataset, returns None otherwise.
+    """
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if any(metadata.get(key) != value for key, value in catalogue_metadata(version).items()):
+        return None
+    return pq.read_table(path).to_pandas()
+
+
+class PlatformCatalogue:
+    """
+    Families, their platforms (most games first) and the generation of each
+    platform (the one of most of its games). Every lookup is a dict access.
+    """
+
+    def __init__(self, counts):
+        """
+        Parameters:
+        - counts: output of platform_counts / merge_counts
+        """
+        families = counts[counts["platform"].isna()]
+        self.family_games = families.groupby("family")["games"].sum().sort_index()
+
+        platforms = counts.dropna(subset=["platform"])
+        platforms = platforms.sort_values(["games", "generation"], ascending=[False, True], kind="stable")
+        table = (
+            platforms.groupby(["family", "platform"], sort=False)
+            .agg(generation=("generation", "first"), games=("games", "sum"))
+            .reset_index()
+            .sort_values(["games", "platform"], ascending=[False, True], kind="stable")
+        )
+        self.table = table.reset_index(drop=True)
+
+        self._platforms = {family: group["platform"].tolist() for family, group in self.table.groupby("family")}
+        self._generations = {}
+        self._family = {}
+        for family, platform, generation in zip(self.table["family"], self.table["platform"], self.table["generation"]):
+            self._generations.setdefault(platform, int(generation))
+            self._family.setdefault(platform, family)
+
+    @property
+    def families(self):
+        """
+        Every platform family, sorted by name.
+        """
+        return self.family_games.index.tolist()
+
+    def platforms(self, family, exclude=()):
+        """
+        Platforms of a family, most games first.
+
+        Parameters:
+        - family: platform family (e.g. "PlayStation")
+        - exclude: platforms left out of the list
+        """
+        return [p for p in self._platforms.get(family, []) if p not in exclude]
+
+    def generation(self, platform):
+        return self._generations.get(platform)
+
+    def other_generations(self, platform, exclude=()):
+        """
+        Platforms of the previous and next generations of platform, in its
+        family and its line (home consoles or portables), most games first.
+
+        Parameters:
+        - platform: platform name (e.g. "PlayStation 4" -> PlayStation 3, PlayStation 5)
+        - exclude: platforms left out of the list
+        """
+        generation = self.generation(platform)
+        if generation is None:
+            return []
+        portable = platform in PORTABLE_PLATFORMS
+        line = [
+            p for p in self.platforms(self._family[platform], exclude)
+            if (p in PORTABLE_PLATFORMS) == portable and self._generations[p] != generation
+        ]
+        previous = max((self._generations[p] for p in line if self._generations[p] < generation), default=None)
+        following = min((self._generations[p] for p in line if self._generations[p] > generation), default=None)
+        return [p for p in line if self._generations[p] in (previous, following)]
@@ -0,0 +1,143 @@
+## Filters of the platform / company explorer (map page), compiled to one mask and memoised
+
+# Import the required libraries
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from utils.io import is_list_column
+
+# Number of filter combinations whose result is kept
+CACHE_SIZE = 64
+
+
+class Query:
+    """
+    Options of the explorer panel. None means "no filter" (the "All ..."
+    boxes), options hidden by another choice are ignored, so two sets of
+    widgets giving the same games give the same key.
+    """
+
+    def __init__(self, reliable_only=False, developer=None, publisher=None, family=None,
+                 exclusive=False, pc=False, platform=None, cross_generation=False):
+        """
+        Parameters:
+        - reliable_only: only the games with reliable votes
+        - developer / publisher: company that must be in the game's list
+        - family: platform family (Nintendo, PlayStation, Xbox)
+        - exclusive: only the games released on this family alone
+        - pc: a release on PC (or Windows) does not break the exclusivity
+        - platform: precise platform, alone unless cross_generation
+        - cross_generation: the game may also be on other platforms (a PS4
+          game also released on PS3 or PS5...)
+        """
+        self.reliable_only = bool(reliable_only)
+        self.developer = developer
+        self.publisher = publisher
+        self.family = family
+        self.exclusive = family is not None and bool(exclusive)
+        self.pc = (self.exclusive or platform is not None) and bool(pc)
+        self.platform = platform
+        self.cross_generation = platform is not None and bool(cross_generation)
+
+    @property
+    def key(self):
+        return (self.reliable_only, self.developer, self.publisher, self.family,
+                self.exclusive, self.pc, self.platform, self.cross_generation)
+
+    def __eq__(self, other):
+        return isinstance(other, Query) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def mask(self, data):
+        """
+        Boolean mask of the games matching every option, combined from the
+        inverted indexes of the dataset in a single pass.
+        """
+        mask = np.ones(len(data), dtype=bool)
+
+        if self.reliable_only:
+            mask &= data.view(["has_reliable_votes"])["has_reliable_votes"].to_numpy()
+        if self.developer is not None:
+            mask &= data.index("developer_company").contains(self.developer)
+        if self.publisher is not None:
+            mask &= data.index("publisher_company").contains(self.publisher)
+
+        if self.family is not None:
+            families = data.index("platform_family")
+            if not self.exclusive:
+                mask &= families.contains(self.family)
+            elif self.pc:
+                mask &= families.equals_or_with(self.family, "Windows")
+            else:
+                mask &= families.equals({self.family})
+
+        if self.platform is not None:
+            platforms = data.index("platforms")
+            if self.cross_generation and self.pc:
+                mask &= platforms.contains_any([self.platform, "PC"])
+            elif self.cross_generation:
+                mask &= platforms.contains(self.platform)
+            elif self.pc:
+                mask &= platforms.equals_or_with(self.platform, "PC")
+            else:
+                mask &= platforms.equals({self.platform})
+
+        return mask
+
+
+class QueryResult:
+    """
+    Games matching a query (row positions, by release date) and their
+    counts per category, shared by the pie and the table of the explorer.
+    """
+
+    def __init__(self, data, query):
+        rows = np.flatnonzero(query.mask(data))
+        dates = data.view(["first_release_date"])["first_release_date"].iloc[rows].reset_index(drop=True)
+        self.rows = rows[dates.sort_values().index.to_numpy()]
+        self._data = data
+        self._counts = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def counts(self, category):
+        """
+        Number of games per value of category (a list column counts each of its values).
+        """
+        if category not in self._counts:
+            games = self._data.view([category]).iloc[self.rows]
+            if is_list_column(games[category]):
+                games = games.explode(category)
+            self._counts[category] = games.groupby(category).size().reset_index(name="count")
+        return self._counts[category].copy(deep=False)
+
+
+class QueryCache:
+    """
+    Results of the last CACHE_SIZE queries, least recently used dropped first.
+    Shared by the sessions, so the order is only changed under a lock.
+    """
+
+    def __init__(self, data, size=CACHE_SIZE):
+        self._data = data
+        self._size = size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        with self._lock:
+            result = self._results.get(query)
+            if result is not None:
+                self._results.move_to_end(query)
+                return result
+
+        result = QueryResult(self._data, query)
+        with self._lock:
+            self._results[query] = result
+            if len(self._results) > self._size:
+                self._results.popitem(last=False)
+        return result
@@ -0,0 +1,211 @@
+## Search indexes on names (developer and publisher companies, game titles)
+
+# Import the required libraries
+import re
+import unicodedata
+import numpy as np
+
+# Longest n-gram indexed: longer queries intersect their trigrams
+GRAM = 3
+# Share of the query trigrams a title must have to match despite typos
+MIN_SHARED = 0.5
+# Titles kept for a query of 1 or 2 characters (the shortest ones containing it)
+SHORT_RESULTS = 50
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """
+    Case- and accent-insensitive form of a name ("Pokémon" -> "pokemon").
+    """
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def ngrams(text, sizes=range(1, GRAM + 1)):
+    """
+    Distinct substrings of text of each length in sizes.
+    """
+    return {text[i:i + n] for n in sizes for i in range(len(text) - n + 1)}
+
+
+class NameSearch:
+    """
+    Substring search over names, ranked by number of games.
+
+    Names are numbered by rank (most games first), and every n-gram of
+    1 to GRAM characters keeps the sorted array of the names containing it.
+    A query of up to GRAM characters is a single lookup; a longer one
+    intersects the arrays of its trigrams (rarest first) and checks the few
+    candidates left, in rank order, until k names are found.
+    """
+
+    def __init__(self, counts):
+        """
+        Parameters:
+        - counts: Series of number of games per name (e.g. ListIndex.counts)
+        """
+        keys = {name: normalize(name) for name in counts.index}
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], keys[item[0]]))
+        self.names = [name for name, _ in ranked]
+        self.counts = np.array([count for _, count in ranked], dtype=np.int64)
+        self._keys = [keys[name] for name in self.names]
+
+        postings = {}
+        for rank, key in enumerate(self._keys):
+            for gram in ngrams(key):
+                postings.setdefault(gram, []).append(rank)
+        self._postings = {gram: np.array(ranks, dtype=np.int32) for gram, ranks in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, k=50):
+        """
+        Names containing query (ignoring case and accents), most games first.
+
+        Parameters:
+        - query: text typed by the user
+        - k: maximum number of names returned
+        """
+        query = normalize(query).strip()
+        if not query:
+            return []
+        if len(query) <= GRAM:
+            ranks = self._postings.get(query, ())
+            return [self.names[rank] for rank in ranks[:k]]
+
+        candidates = None
+        for gram in sorted(ngrams(query, [GRAM]), key=lambda g: len(self._postings.get(g, ()))):
+            ranks = self._postings.get(gram)
+            if ranks is None:
+                return []
+            candidates = ranks if candidates is None else np.intersect1d(candidates, ranks, assume_unique=True)
+            if len(candidates) == 0:
+                return []
+
+        # Trigrams can match out of order: check the query itself
+        results = []
+        for rank in candidates:
+            if query in self._keys[rank]:
+                results.append(self.names[rank])
+                if len(results) == k:
+                    break
+        return results
+
+
+def title_key(text):
+    """
+    Normalised title: lowercase, no accents, punctuation turned into single
+    spaces ("The Legend of Zelda: Breath" -> "the legend of zelda breath").
+    """
+    return " ".join(WORD.findall(normalize(text)))
+
+
+def trigrams(key):
+    """
+    Trigrams of a normalised title, padded with a space at both ends so that
+    the first and last letters of the title count as much as the others.
+    """
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleSearch:
+    """
+    Typo-tolerant search over game titles.
+
+    Every trigram of every normalised title is stored once, with the ids of
+    the titles containing it (one flat array, sliced per trigram). A query
+    counts, for every title, the trigrams it shares with the query (one
+    numpy.bincount over the matching slices) and ranks the titles:
+    - titles containing the query as it is typed come first,
+    - then titles sharing at least MIN_SHARED of the query trigrams
+      ("zelda breth wild" still finds "... Zelda: Breath of the Wild"),
+    ties going to the title closest in length (Dice coefficient).
+    Queries of 1 or 2 characters are answered from their own postings: the
+    SHORT_RESULTS shortest titles containing every 1- and 2-gram, stored in
+    that order, so a keystroke costs one lookup.
+    Matching never goes through regular expressions.
+    """
+
+    def __init__(self, names):
+        """
+        Parameters:
+        - names: Series of titles (one per game, in row order)
+        """
+        self.size = len(names)
+        self._keys = np.array([title_key(name) for name in names], dtype=object)
+        self._n_grams = np.empty(self.size, dtype=np.int32)
+
+        ids, gram_ids = {}, []
+        for row, key in enumerate(self._keys):
+            grams = trigrams(key) if key else set()
+            self._n_grams[row] = len(grams)
+            gram_ids.extend(ids.setdefault(gram, len(ids)) for gram in grams)
+        gram_ids = np.array(gram_ids, dtype=np.int32)
+        title_ids = np.repeat(np.arange(self.size, dtype=np.int32), self._n_grams)
+
+        # Postings of gram g: self._rows[self._bounds[g]:self._bounds[g + 1]]
+        order = np.argsort(gram_ids, kind="stable")
+        self._rows = title_ids[order]
+        self._bounds = np.concatenate([[0], np.cumsum(np.bincount(gram_ids, minlength=len(ids)))])
+        self._ids = ids
+
+        # Shortest titles first: a 1- or 2-gram stops collecting titles once full
+        short = {}
+        lengths = np.fromiter(map(len, self._keys), dtype=np.int64, count=self.size)
+        for row in np.argsort(lengths, kind="stable"):
+            for gram in ngrams(self._keys[row], (1, 2)):
+                rows = short.setdefault(gram, [])
+                if len(rows) < SHORT_RESULTS:
+                    rows.append(row)
+        self._short = {gram: np.array(rows, dtype=np.int64) for gram, rows in short.items()}
+
+    def __len__(self):
+        return self.size
+
+    def _shared(self, grams):
+        """
+        Number of grams shared with every title.
+        """
+        slices = [self._rows[self._bounds[g]:self._bounds[g + 1]] for g in (self._ids.get(gram) for gram in grams) if g is not None]
+        if not slices:
+            return np.zeros(self.size, dtype=np.int64)
+        return np.bincount(np.concatenate(slices), minlength=self.size)
+
+    def search(self, query, k=50):
+        """
+        Row positions of the titles matching query, best first.
+
+        Parameters:
+        - query: text typed by the user (any character is taken literally)
+        - k: maximum number of titles returned (at most SHORT_RESULTS for 1 or 2 characters)
+        """
+        query = title_key(query)
+        if not query:
+            return np.empty(0, dtype=np.int64)
+        if len(query) < 3:
+            # Too short for trigrams: the shortest titles containing the query
+            return self._short.get(query, np.empty(0, dtype=np.int64))[:k]
+
+        grams = trigrams(query)
+        shared = self._shared(grams)
+        dice = 2 * shared / (len(grams) + self._n_grams)
+
+        # Titles containing every inner trigram of the query may contain the query itself
+        inner = {query[i:i + 3] for i in range(len(query) - 2)}
+        exact_rows = np.flatnonzero(self._shared(inner) == len(inner))
+        if len(query) > 3:
+            exact_rows = exact_rows[np.array([query in self._keys[row] for row in exact_rows], dtype=bool)]
+        exact_rows = exact_rows[np.argsort(-dice[exact_rows], kind="stable")][:k]
+        if len(exact_rows) == k:
+            return exact_rows
+
+        # Then the closest titles sharing enough trigrams
+        fuzzy = shared >= MIN_SHARED * len(grams)
+        fuzzy[exact_rows] = False
+        fuzzy_rows = np.flatnonzero(fuzzy)
+        score = shared[fuzzy_rows] + dice[fuzzy_rows]
+        fuzzy_rows = fuzzy_rows[np.argsort(-score, kind="stable")][:k - len(exact_rows)]
+        return np.concatenate([exact_rows, fuzzy_rows])
@@ -0,0 +1,163 @@
+## Similar games: MinHash signatures (built at ingest) and an LSH index over them
+
+# Import the required libraries
+import os
+import zlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Signatures written next to the games snapshot at ingest
+MINHASH_PATH = "data/minhash.parquet"
+# Bumped whenever the signatures change (tokens, hash functions...), older ones are rebuilt
+MINHASH_FORMAT = "1"
+
+# List columns describing a game, and the prefix of their tokens
+TOKEN_COLUMNS = {
+    "genres": "genre",
+    "player_perspectives": "perspective",
+    "game_modes": "mode",
+    "platforms": "platform",
+    "developer_company": "developer",
+}
+
+# 96 hash functions, cut in 32 bands of 3: two games with a Jaccard
+# similarity s share at least one band with probability 1 - (1 - s^3)^32
+# (about 0.99 at s = 0.5, 0.88 at s = 0.4, 0.59 at s = 0.3)
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20250101)
+HASH_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+HASH_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+
+# Games hashed together (bounds the size of the temporary hash table)
+BLOCK = 2048
+# Candidates whose exact similarity is computed, the others are ranked by their signature
+MAX_CANDIDATES = 500
+
+
+def game_tokens(df):
+    """
+    Set of tokens of every game ("genre:Indie", "platform:PC"...).
+    """
+    tokens = [set() for _ in range(len(df))]
+    for column, prefix in TOKEN_COLUMNS.items():
+        for game_tokens_, values in zip(tokens, df[column]):
+            game_tokens_.update(f"{prefix}:{value}" for value in values)
+    return tokens
+
+
+def signatures(df):
+    """
+    MinHash signature of every game (n games x NUM_PERM, uint32). Tokens are
+    hashed with crc32, so signatures do not depend on the other games and
+    chunks of the snapshot can be hashed separately.
+    A game without any token gets PRIME everywhere (similar to no game).
+    """
+    tokens = game_tokens(df)
+    result = np.full((len(tokens), NUM_PERM), PRIME, dtype=np.uint32)
+    for start in range(0, len(tokens), BLOCK):
+        block = tokens[start:start + BLOCK]
+        counts = np.fromiter(map(len, block), dtype=np.int64, count=len(block))
+        if counts.sum() == 0:
+            continue
+        values = np.fromiter((zlib.crc32(t.encode()) for game in block for t in game), dtype=np.uint64, count=counts.sum())
+        hashed = (values[:, None] % PRIME * HASH_A + HASH_B) % PRIME
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        result[start + filled] = np.minimum.reduceat(hashed, starts, axis=0)
+    return result
+
+
+def minhash_metadata(version):
+    return {b"dataset_version": version.encode(), b"minhash_format": MINHASH_FORMAT.encode()}
+
+
+def signature_frame(signature):
+    return pd.DataFrame(signature, columns=[f"h{i}" for i in range(NUM_PERM)])
+
+
+def write_signatures(signature, version, path=MINHASH_PATH):
+    table = pa.Table.from_pandas(signature_frame(signature), preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), **minhash_metadata(version)}
+    # Written next to path and moved over it: another process never reads half a file
+    partial = f"{path}.{os.getpid()}.partial"
+    pq.write_table(table.replace_schema_metadata(metadata), partial)
+    os.replace(partial, path)
+
+
+def load_signatures(version, path=MINHASH_PATH):
+    """
+    Reads the signatures if they were built from this version of the
+    dataset, returns None otherwise.
+    """
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if any(metadata.get(key) != value for key, value in minhash_metadata(version).items()):
+        return None
+    return pq.read_table(path).to_pandas().to_numpy(dtype=np.uint32)
+
+
+class SimilarGames:
+    """
+    LSH index of the MinHash signatures: for every band, the games are
+    grouped by the values of their signature in that band. The candidates
+    of a game are the games sharing at least one band with it; only they
+    are compared (exact Jaccard similarity of their tokens).
+    """
+
+    def __init__(self, signature, df):
+        """
+        Parameters:
+        - signature: output of signatures / load_signatures
+        - df: games DataFrame (token columns), aligned on signature
+        """
+        self._signature = signature
+        self._df = df
+        self._buckets = []
+        for band in range(BANDS):
+            keys = np.ascontiguousarray(signature[:, band * ROWS:(band + 1) * ROWS])
+            keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * ROWS))).ravel()
+            _, bucket = np.unique(keys, return_inverse=True)
+            order = np.argsort(bucket, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(bucket))])
+            self._buckets.append((bucket, order, bounds))
+        # Games without tokens would all fall in the same buckets
+        self._empty = (signature == PRIME).all(axis=1)
+
+    def candidates(self, row):
+        """
+        Row positions of the games sharing at least one band with row.
+        """
+        if self._empty[row]:
+            return np.empty(0, dtype=np.int64)
+        members = []
+        for bucket, order, bounds in self._buckets:
+            b = bucket[row]
+            members.append(order[bounds[b]:bounds[b + 1]])
+        members = np.unique(np.concatenate(members))
+        return members[members != row]
+
+    def similar(self, row, k=5):
+        """
+        The k games closest to row: DataFrame of their row positions
+        ("row") and Jaccard similarity ("similarity"), best first.
+
+        Parameters:
+        - row: row position of the game
+        - k: number of games returned
+        """
+        candidates = self.candidates(row)
+        # Estimated similarity: share of hash functions giving the same minimum
+        estimate = (self._signature[candidates] == self._signature[row]).mean(axis=1)
+        candidates = candidates[np.argsort(-estimate, kind="stable")[:MAX_CANDIDATES]]
+
+        tokens = game_tokens(self._df.iloc[np.concatenate([[row], candidates])])
+        own = tokens[0]
+        similarity = np.array([len(own & other) / len(own | other) for other in tokens[1:]])
+        best = np.argsort(-similarity, kind="stable")[:k]
+        return pd.DataFrame({"row": candidates[best], "similarity": similarity[best]})
@@ -4,6 +4,7 @@ import numpy as np
 
 # Import the required libraries
 import plotly.express as px
+import plotly.graph_objects as go
 
 
 def map_general(df, title):
@@ -31,26 +32,66 @@ def map_general(df, title):
     return fig
 
 def map_general_year(df, title):
+    """
+    Animated choropleth, one frame per year. The country codes are sent once
+    in the trace, each frame only carries its values (z) and hover data
+    (developer, publisher), so the payload stays small with many years.
 
-    fig = px.choropleth(
-        df,
-        locations="iso_alpha",   
-        color="total",           
-        color_continuous_scale="Blues",  
-        projection="natural earth",
-        hover_data={
-            "developer": True,
-            "publisher": True,
-            "total": False  
-        },
-        animation_frame="year",
-        title=title,
+    Parameters:
+    - df: one row per (country, year) with iso_alpha, developer, publisher and total
+    """
+    # Countries sharing an ISO code are a single shape on the map
+    df = df.groupby(["year", "iso_alpha"])[["developer", "publisher", "total"]].sum()
+    years = df.index.get_level_values("year").unique().sort_values()
+    locations = df.index.get_level_values("iso_alpha").unique().sort_values()
+
+    frames = []
+    for year in years:
+        # Countries without game this year stay blank (NaN), like px does
+        values = df.loc[year].reindex(locations)
+        frames.append(go.Frame(
+            name=str(year),
+            data=[go.Choropleth(
+                z=values["total"].to_numpy(dtype="float64"),
+                customdata=values[["developer", "publisher"]].to_numpy(dtype="float64"),
+            )],
+            traces=[0],
+        ))
+
+    # Same play / pause buttons and slider as px.choropleth(animation_frame=...)
+    animation = {"frame": {"duration": 500, "redraw": True}, "mode": "immediate",
+                 "fromcurrent": True, "transition": {"duration": 500, "easing": "linear"}}
+    jump = {"frame": {"duration": 0, "redraw": True}, "mode": "immediate",
+            "fromcurrent": True, "transition": {"duration": 0, "easing": "linear"}}
+
+    fig = go.Figure(
+        data=[go.Choropleth(
+            locations=locations.tolist(),
+            z=frames[0].data[0].z,
+            customdata=frames[0].data[0].customdata,
+            coloraxis="coloraxis",
+            hovertemplate="iso_alpha=%{location}<br>developer=%{customdata[0]}<br>publisher=%{customdata[1]}<extra></extra>",
+        )],
+        frames=frames,
     )
 
     fig.update_layout(
-        coloraxis_colorbar=dict(
-            title="Number of games"
-        )
+        title=title,
+        geo=dict(projection_type="natural earth"),
+        coloraxis=dict(colorscale="Blues", colorbar=dict(title="Number of games")),
+        updatemenus=[dict(
+            type="buttons", direction="left", showactive=False,
+            x=0.1, xanchor="right", y=0, yanchor="top", pad={"r": 10, "t": 70},
+            buttons=[
+                dict(label="&#9654;", method="animate", args=[None, animation]),
+                dict(label="&#9724;", method="animate", args=[[None], jump]),
+            ],
+        )],
+        sliders=[dict(
+            active=0, currentvalue={"prefix": "year="}, len=0.9,
+            x=0.1, xanchor="left", y=0, yanchor="top", pad={"b": 10, "t": 60},
+            steps=[dict(label=str(year), method="animate", args=[[str(year)], jump]) for year in years],
+        )],
     )
 
     return fig
@@ -4,8 +4,61 @@
 # Import the required libraries
 import seaborn as sns
 import pandas as pd
-import matplotlib.pyplot as plt
 import plotly.express as px
+from matplotlib.figure import Figure
+from matplotlib import font_manager
+
+# Seaborn "whitegrid" style at "notebook" sizes, read once. It is applied to
+# each figure (new_figure, BAR, style_legend...) and never to the global
+# rcParams, so sessions drawing at the same time cannot change each other's charts
+STYLE = {**sns.axes_style("whitegrid"), **sns.plotting_context("notebook")}
+# First installed font of the style (looked up once, not on every text)
+INSTALLED_FONTS = {font.name for font in font_manager.fontManager.ttflist}
+FONT = next((font for font in STYLE["font.sans-serif"] if font in INSTALLED_FONTS), "sans-serif")
+TEXT_COLOR = STYLE["text.color"]
+# Bars: white edges as with the seaborn theme
+BAR = {"edgecolor": STYLE["patch.edgecolor"], "linewidth": STYLE["patch.linewidth"]}
+
+
+def new_figure(figsize=(14,6)):
+    """
+    Creates a figure and its axes outside pyplot, styled on the figure itself.
+    The figure is not kept by pyplot's global figure manager, so it is freed
+    as soon as the caller drops it, and no global state is read or written:
+    charts can be drawn from several threads at once.
+    """
+    fig = Figure(figsize=figsize, facecolor=STYLE["figure.facecolor"])
+    ax = fig.subplots()
+
+    ax.set_facecolor(STYLE["axes.facecolor"])
+    ax.set_axisbelow(STYLE["axes.axisbelow"])
+    for spine in ax.spines.values():
+        spine.set_edgecolor(STYLE["axes.edgecolor"])
+        spine.set_linewidth(STYLE["axes.linewidth"])
+    ax.grid(STYLE["axes.grid"], color=STYLE["grid.color"], linestyle=STYLE["grid.linestyle"], linewidth=STYLE["grid.linewidth"])
+
+    # Ticks are created when the figure is drawn: their style is stored on the axes
+    for axis in ["x", "y"]:
+        ticks = dict(
+            color=STYLE[f"{axis}tick.color"], labelcolor=STYLE[f"{axis}tick.color"],
+            labelsize=STYLE[f"{axis}tick.labelsize"], labelfontfamily=FONT,
+            bottom=STYLE["xtick.bottom"], top=STYLE["xtick.top"], left=STYLE["ytick.left"], right=STYLE["ytick.right"],
+        )
+        for which in ["major", "minor"]:
+            ax.tick_params(axis=axis, which=which, width=STYLE[f"{axis}tick.{which}.width"], length=STYLE[f"{axis}tick.{which}.size"], **ticks)
+
+    ax.title.set(color=TEXT_COLOR, family=FONT, size=STYLE["axes.titlesize"])
+    for label in [ax.xaxis.label, ax.yaxis.label]:
+        label.set(color=STYLE["axes.labelcolor"], family=FONT, size=STYLE["axes.labelsize"])
+    return fig, ax
+
+
+def style_legend(legend):
+    """
+    Applies the figure style to the texts of a legend.
+    """
+    for text in [legend.get_title(), *legend.get_texts()]:
+        text.set(color=TEXT_COLOR, family=FONT)
 
 
 def plot_average_rating(df, excluded_categories=False):
@@ -30,9 +83,8 @@ def plot_average_rating(df, excluded_categories=False):
     # Calculate the global mean
     global_mean = filtered_df["average_rating"].mean()
 
-    # Set seaborn theme
-    fig, ax = plt.subplots(figsize=(14,6))
-    sns.set_theme(style="whitegrid")
+    # Styled figure (seaborn whitegrid)
+    fig, ax = new_figure()
 
     # Add a horizontal line at the mean value
     ax.axhline(global_mean, color="red", linestyle="--", linewidth=2, label=f"Global Mean ({global_mean:.1f})")
@@ -43,7 +95,8 @@ def plot_average_rating(df, excluded_categories=False):
         x="year",
         y="average_rating",
         palette="flare",
-        ax=ax
+        ax=ax,
+        **BAR
     )
 
     # Add titles and labels
@@ -78,9 +131,8 @@ def plot_average_rating_collection(df, excluded_categories=False):
     # Calculate the global mean
     global_mean = filtered_df["average_rating"].mean()
 
-    # Set seaborn theme
-    sns.set_theme(style="whitegrid")
-    fig, ax = plt.subplots(figsize=(14,6))
+    # Styled figure (seaborn whitegrid)
+    fig, ax = new_figure()
 
     # Colors
     palette = {False: "#4e79a7", True: "#3cc465"} 
@@ -92,7 +144,8 @@ def plot_average_rating_collection(df, excluded_categories=False):
         y="average_rating",
         hue="has_collections",
         palette=palette,
-        ax=ax
+        ax=ax,
+        **BAR
     )
 
     # Horizontal line for global mean
@@ -105,7 +158,7 @@ def plot_average_rating_collection(df, excluded_categories=False):
     ax.tick_params(axis='x', rotation=45)
 
     # Legend 
-    ax.legend(
+    legend = ax.legend(
         title="Part of a Collection?", 
         title_fontsize=12, 
         fontsize=11, 
@@ -113,6 +166,7 @@ def plot_average_rating_collection(df, excluded_categories=False):
         frameon=True, 
         framealpha=0.9,
     )
+    style_legend(legend)
 
     return fig
 
@@ -140,9 +194,8 @@ def plot_average_rating_genre(df, excluded_categories=False):
     # Calculate the global mean
     global_mean = filtered_df["average_rating"].mean()
 
-    # Set seaborn theme
-    sns.set_theme(style="whitegrid")
-    fig, ax = plt.subplots(figsize=(14,6))
+    # Styled figure (seaborn whitegrid)
+    fig, ax = new_figure()
 
     # Colors
     palette = {True: "#924ea7", False: "#553cc4"} 
@@ -154,7 +207,8 @@ def plot_average_rating_genre(df, excluded_categories=False):
         y="average_rating",
         hue="is_indie",
         palette=palette,
-        ax=ax
+        ax=ax,
+        **BAR
     )
 
     # Horizontal line for global mean
@@ -167,7 +221,7 @@ def plot_average_rating_genre(df, excluded_categories=False):
     ax.tick_params(axis='x', rotation=45)
 
     # Legend 
-    ax.legend(
+    legend = ax.legend(
         title="Is an Indie?", 
         title_fontsize=12, 
         fontsize=11, 
@@ -175,6 +229,7 @@ def plot_average_rating_genre(df, excluded_categories=False):
         frameon=True, 
         framealpha=0.9,
     )
+    style_legend(legend)
 
     return fig
 
@@ -203,9 +258,8 @@ def plot_average_rating_companies_exclu(df, name, excluded_categories=False):
     # Calculate the global mean
     global_mean = filtered_df["average_rating"].mean()
 
-    # Set seaborn theme
-    sns.set_theme(style="whitegrid")
-    fig, ax = plt.subplots(figsize=(14,6))
+    # Styled figure (seaborn whitegrid)
+    fig, ax = new_figure()
 
     # Colors
     palettes = {
@@ -226,7 +280,8 @@ def plot_average_rating_companies_exclu(df, name, excluded_categories=False):
         y="average_rating",
         hue="is_exclu",
         palette=palettes[name],
-        ax=ax
+        ax=ax,
+        **BAR
     )
 
     ax.axhline(global_mean, color="red", linestyle="--", linewidth=2, label=f"Global Mean ({global_mean:.1f})")
@@ -238,7 +293,7 @@ def plot_average_rating_companies_exclu(df, name, excluded_categories=False):
     ax.tick_params(axis='x', rotation=45)
 
     # Legend 
-    ax.legend(
+    legend = ax.legend(
         title="Is an Exclu?", 
         title_fontsize=12, 
         fontsize=11, 
@@ -246,6 +301,7 @@ def plot_average_rating_companies_exclu(df, name, excluded_categories=False):
         frameon=True, 
         framealpha=0.9,
     )
+    style_legend(legend)
 
     return fig
 
@@ -263,15 +319,15 @@ def plot_top10(df, palette, excluded_categories=False):
 
     filtered_df = filtered_df.head(15)
 
-    sns.set_theme(style="whitegrid")
-    fig, ax = plt.subplots(figsize=(14,6))
+    fig, ax = new_figure()
 
     sns.barplot(
         data=filtered_df,
         x="total_rating",
         y="name",
         ax=ax,
-        palette=palette
+        palette=palette,
+        **BAR
     )
 
     if palette == "flare":
@@ -288,7 +344,7 @@ def plot_top10(df, palette, excluded_categories=False):
     ax.set_ylabel("Name", fontsize=12)
 
     for i, v in enumerate(filtered_df["total_rating"]):
-        ax.text(v + 0.2, i, f"{v:.1f}", color='black', va='center', fontsize=10)
+        ax.text(v + 0.2, i, f"{v:.1f}", color='black', va='center', fontsize=10, family=FONT)
 
     return fig
 